@@ -1,17 +1,100 @@
 #!/usr/bin/env python3
+import functools
+import importlib
 import logging
 import sys
 import os
-import argparse
-from .confluence_converter import ConfluenceConverter
-from .client import ConfluenceApiClient
-from .converter import MarkdownConverter
+import typing
+from .errors import ConfluenceError
 
+# The converter and client pull in `markdown` and `requests`; load them on
+# first use so `--help` and argument errors don't pay for those imports.
+_LAZY_IMPORTS = {
+    "ConfluenceConverter": ".confluence_converter",
+    "ConfluenceApiClient": ".client",
+    "MarkdownConverter": ".converter",
+}
 
+_MAX_FILE_WORKERS = 4
+
+
+class Config(typing.NamedTuple):
+    """
+    NamedTuple containing the resolved command line configuration
+
+    """
+
+    markdown_files: typing.List[str]
+    """ Markdown files to convert and upload """
+
+    space_key: str
+    """ Confluence Space key """
+
+    username: str
+    """ Confluence user name """
+
+    api_key: str
+    """ Confluence API key """
+
+    org_name: str
+    """ Confluence organisation or fully qualified domain name """
+
+    ancestor: str
+    """ Title of the parent page """
+
+    use_ssl: bool
+    """ Use HTTPS rather than HTTP """
+
+    delete: bool
+    """ Delete the page instead of creating it """
+
+    simulate: bool
+    """ Only convert, do not publish """
+
+    version: int
+    """ Confluence editor version """
+
+    markdown_source: str
+    """ Markdown flavour: `default` or `bitbucket` """
+
+    labels: typing.List[str]
+    """ Labels to set on the page """
+
+    properties: dict
+    """ Content properties to set on the page """
+
+    attachments: typing.List[str]
+    """ Attachments to upload, relative to the markdown file """
+
+    contents: bool
+    """ Add a contents section to the page """
+
+    title: str
+    """ Page title, defaults to the first line of the markdown file """
+
+    remove_emojies: bool
+    """ Remove emojies from the page """
+
+    log_level: str
+    """ Logging level name """
+
+
+def __getattr__(name: str):
+    module_name = _LAZY_IMPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(module_name, __name__), name)
+
+
+@functools.lru_cache(maxsize=1)
 def get_parser():
+    import argparse
+
     PARSER = argparse.ArgumentParser()
     PARSER.add_argument(
-        "markdownFile", help="Full path of the markdown file to convert and upload."
+        "markdownFile",
+        nargs="+",
+        help="Full path of the markdown file(s) to convert and upload.",
     )
     PARSER.add_argument(
         "spacekey",
@@ -34,7 +117,8 @@ def get_parser():
     PARSER.add_argument(
         "-a",
         "--ancestor",
-        help="Parent page under which page will be created or moved.",
+        help="Parent page under which page will be created or moved. "
+        "With several files, it is looked up once and shared by every page.",
     )
     PARSER.add_argument(
         "-t",
@@ -153,69 +237,139 @@ def main():
     Main program
 
     """
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s - \
-        %(levelname)s - %(funcName)s [%(lineno)d] - \
-        \t%(message)s",
-    )
+    try:
+        run()
+    except ConfluenceError as err:
+        logging.getLogger(__name__).error(str(err))
+        sys.exit(1)
+
+
+def get_config(args: typing.Optional[typing.List[str]] = None) -> Config:
+    """
+    Parse the command line and environment into a `Config`
+
+    Exits the program if the configuration is invalid.
+
+    Args:
+        args: command line arguments, defaults to `sys.argv[1:]`
+    Returns:
+        The resolved configuration
+    """
     LOGGER = logging.getLogger(__name__)
 
     # ArgumentParser to parse arguments and options
-    PARSER = get_parser()
+    ARGS = get_parser().parse_args(args)
 
-    ARGS = PARSER.parse_args()
-
-    # Assign global variables
     try:
-        # Set log level
-        LOGGER.setLevel(getattr(logging, ARGS.loglevel.upper(), None))
-
-        MARKDOWN_FILE = ARGS.markdownFile
-        SPACE_KEY = ARGS.spacekey
-        USERNAME = os.getenv("CONFLUENCE_USERNAME", ARGS.username)
-        API_KEY = os.getenv("CONFLUENCE_API_KEY", ARGS.apikey)
-        ORGNAME = os.getenv("CONFLUENCE_ORGNAME", ARGS.orgname)
-        ANCESTOR = ARGS.ancestor
-        NOSSL = ARGS.nossl
-        DELETE = ARGS.delete
-        SIMULATE = ARGS.simulate
-        VERSION = ARGS.version
-        MARKDOWN_SOURCE = ARGS.markdownsrc
-        LABELS = ARGS.labels
-        PROPERTIES = dict(ARGS.properties)
-        ATTACHMENTS = ARGS.attachment
-        CONTENTS = ARGS.contents
-        TITLE = ARGS.title
-        REMOVE_EMOJIES = ARGS.remove_emojies
-
-        validate_args(USERNAME, API_KEY, MARKDOWN_FILE, ORGNAME)
+        markdown_files = ARGS.markdownFile
+        config = Config(
+            markdown_files=markdown_files,
+            space_key=ARGS.spacekey,
+            username=os.getenv("CONFLUENCE_USERNAME", ARGS.username),
+            api_key=os.getenv("CONFLUENCE_API_KEY", ARGS.apikey),
+            org_name=os.getenv("CONFLUENCE_ORGNAME", ARGS.orgname),
+            ancestor=ARGS.ancestor,
+            use_ssl=not ARGS.nossl,
+            delete=ARGS.delete,
+            simulate=ARGS.simulate,
+            version=ARGS.version,
+            markdown_source=ARGS.markdownsrc,
+            labels=ARGS.labels,
+            properties=dict(ARGS.properties),
+            attachments=ARGS.attachment,
+            contents=ARGS.contents,
+            title=ARGS.title,
+            remove_emojies=ARGS.remove_emojies,
+            log_level=ARGS.loglevel,
+        )
+
+        for markdown_file in markdown_files:
+            validate_args(
+                config.username, config.api_key, markdown_file, config.org_name
+            )
+
+        if config.title is not None and len(markdown_files) > 1:
+            LOGGER.error("Error: --title can only be used with a single markdown file.")
+            sys.exit(1)
 
     except Exception as err:
         LOGGER.error("\n\nException caught:\n%s ", err)
         LOGGER.error("\nFailed to process command line arguments. Exiting.")
         sys.exit(1)
 
+    return config
+
+
+def run(args: typing.Optional[typing.List[str]] = None):
+    """
+    Convert and publish the markdown file(s) named on the command line
+
+    Can be called repeatedly from another Python program; the argument
+    parser is built once and reused between calls.
+
+    Args:
+        args: command line arguments, defaults to `sys.argv[1:]`
+    """
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - \
+        %(levelname)s - %(funcName)s [%(lineno)d] - \
+        \t%(message)s",
+    )
+    LOGGER = logging.getLogger(__name__)
+
+    config = get_config(args)
+
+    # Set log level
+    LOGGER.setLevel(getattr(logging, config.log_level.upper(), logging.INFO))
+
     LOGGER.info("\t----------------------------------")
     LOGGER.info("\tMarkdown to Confluence Upload Tool")
     LOGGER.info("\t----------------------------------")
 
-    LOGGER.info("Markdown file:\t%s", MARKDOWN_FILE)
-    LOGGER.info("Space Key:\t%s", SPACE_KEY)
+    LOGGER.info("Markdown file(s):\t%s", ", ".join(config.markdown_files))
+    LOGGER.info("Space Key:\t%s", config.space_key)
 
-    confluence_converter: ConfluenceConverter = ConfluenceConverter(
-        MARKDOWN_FILE,
-        MARKDOWN_SOURCE,
-        TITLE,
-        ORGNAME,
-        not NOSSL,
-        USERNAME,
-        SPACE_KEY,
-        API_KEY,
-        ANCESTOR,
-        VERSION,
-    )
+    from .confluence_converter import ConfluenceConverter
 
-    confluence_converter.convert(
-        SIMULATE, DELETE, REMOVE_EMOJIES, CONTENTS, LABELS, PROPERTIES, ATTACHMENTS
-    )
+    # Every page shares one client, and with it the cached space id
+    confluence_client = None
+    converters: typing.List[ConfluenceConverter] = []
+    for markdown_file in config.markdown_files:
+        converter = ConfluenceConverter(
+            markdown_file,
+            config.markdown_source,
+            config.title,
+            config.org_name,
+            config.use_ssl,
+            config.username,
+            config.space_key,
+            config.api_key,
+            config.ancestor,
+            config.version,
+            confluence_client,
+        )
+        confluence_client = converter.confluence_client
+        converters.append(converter)
+
+    def convert(converter: ConfluenceConverter):
+        converter.convert(
+            config.simulate,
+            config.delete,
+            config.remove_emojies,
+            config.contents,
+            config.labels,
+            config.properties,
+            config.attachments,
+        )
+
+    if len(converters) == 1:
+        convert(converters[0])
+        return
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    # The --ancestor page is looked up once and cached by the shared client
+    workers = min(_MAX_FILE_WORKERS, len(converters))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(convert, converters))
@@ -1,15 +1,122 @@
+import functools
 import logging
-import sys
 import os
-import re
 import json
 import typing
 import mimetypes
+import threading
 import urllib
+import contextlib
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from .errors import ConfluenceError
 
 LOGGER = logging.getLogger(__name__)
 
+_MAX_WORKERS = 8
+_POOL_SIZE = 16
+_REMOTE_PREFIXES = ("http://", "https://")
+
+
+def encode_json(payload: typing.Any) -> bytes:
+    """
+    Serialize a request payload to compact UTF-8 JSON
+
+    Page bodies are mostly markup, so skipping the whitespace separators and
+    the `\\uXXXX` escaping of non-ASCII text keeps request bodies small.
+
+    Args:
+        payload: JSON serializable object
+    Returns:
+        The encoded request body
+    """
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode(
+        "utf-8"
+    )
+
+
+@functools.lru_cache(maxsize=256)
+def guess_content_type(filename: str) -> typing.Optional[str]:
+    """
+    Guess the content type of an attachment from its file name
+
+    Args:
+        filename: attachment file name
+    Returns:
+        The MIME type, or None if it cannot be guessed
+    """
+    return mimetypes.guess_type(filename)[0]
+
+
+class _ConfluenceRetry(requests.adapters.Retry):
+    """
+    Retry policy that retries rate limited requests for every method
+
+    Confluence rejects a rate limited request before processing it, so even a
+    POST can be sent again safely. Other status retries are limited to the
+    idempotent `allowed_methods`.
+
+    """
+
+    def is_retry(
+        self, method: str, status_code: int, has_retry_after: bool = False
+    ) -> bool:
+        if status_code == 429 and 429 in (self.status_forcelist or ()):
+            return True
+        return super().is_retry(method, status_code, has_retry_after)
+
+
+def build_retry(server_errors: bool = True) -> requests.adapters.Retry:
+    """
+    Build the retry policy for a session
+
+    Rate limited requests (429) are always retried once the delay from the
+    `Retry-After` header has passed, since Confluence did not process them.
+    Server errors and connection failures are only retried when asked for.
+    Server errors and read timeouts are only retried for GET, PUT and DELETE:
+    a POST may already have been applied, so resending it could create a
+    duplicate property or attachment version.
+    A 404 is a real answer ("not found") and is returned to the caller
+    straight away. Backoff is exponential with jitter so concurrent requests
+    do not retry in lockstep.
+
+    Args:
+        server_errors: Also retry 5xx responses and connection errors.
+    Returns:
+        A configured `Retry` instance
+    """
+    retry_max_requests = 5
+    retry_settings = {
+        "total": retry_max_requests,
+        "backoff_factor": 0.5,
+        "allowed_methods": frozenset({"GET", "PUT", "DELETE"}),
+        "respect_retry_after_header": True,
+        # Return the last response once retries run out, so it reaches
+        # check_errors_and_get_json and becomes a ConfluenceError
+        "raise_on_status": False,
+    }
+    if server_errors:
+        retry_settings.update(
+            {
+                "connect": retry_max_requests,
+                "read": retry_max_requests,
+                "status_forcelist": (429, 500, 502, 503, 504),
+            }
+        )
+    else:
+        retry_settings.update(
+            {
+                "connect": 0,
+                "read": 0,
+                "status_forcelist": (429,),
+            }
+        )
+    try:
+        return _ConfluenceRetry(backoff_jitter=0.5, **retry_settings)
+    except TypeError:
+        # urllib3 < 2 has no jitter support
+        return _ConfluenceRetry(**retry_settings)
+
 
 class CheckedResponse(typing.NamedTuple):
     """
@@ -87,15 +194,51 @@ class ConfluenceApiClient:
         self.user_name = username
         self.api_key = api_key
         self.confluence_api_url = confluence_api_url
+        self._pages_url = f"{confluence_api_url}/api/v2/pages"
+        self._spaces_url = f"{confluence_api_url}/api/v2/spaces"
+        self._content_url = f"{confluence_api_url}/rest/api/content"
         self.space_key = space_key
         self.space_id = -1
         self.editor_version = editor_version
         self.use_ssl = use_ssl
+        self._page_cache: typing.Dict[str, PageInfo] = {}
+        self._attachment_cache: typing.Dict[int, typing.Dict[str, str]] = {}
+        self._editor_cache: typing.Dict[int, str] = {}
+        self._label_cache: typing.Dict[str, LabelInfo] = {}
+        # (page id, attachment name) to the path of the uploaded file
+        self._uploaded: typing.Dict[typing.Tuple[int, str], str] = {}
+        self._sessions: typing.Dict[typing.Tuple[bool, bool], requests.Session] = {}
+        self._session_lock = threading.Lock()
+        self._space_lock = threading.Lock()
+        # Pages may be published concurrently through one client
+        self._cache_lock = threading.Lock()
 
     def get_session(self, retry: bool = False, json: bool = True) -> requests.Session:
         """
         Retrieve a `requests` session object
 
+        Sessions are created once per configuration and reused, so
+        connections are kept alive between API calls.
+
+        Args:
+            retry: Configure the request with a retry adapter.
+            json: Configure the request to set Content-Type to 'application/json'
+        Returns:
+            requests.Session: A session from the `requests` module
+
+        """
+        key = (retry, json)
+        with self._session_lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = self.build_session(retry, json)
+                self._sessions[key] = session
+        return session
+
+    def build_session(self, retry: bool, json: bool) -> requests.Session:
+        """
+        Build a new `requests` session object
+
         Args:
             retry: Configure the request with a retry adapter.
             json: Configure the request to set Content-Type to 'application/json'
@@ -104,22 +247,17 @@ class ConfluenceApiClient:
 
         """
         session = requests.Session()
-        if retry:
-            retry_max_requests = 5
-            retry_backoff_factor = 0.1
-            retry_status_forcelist = (404, 500, 501, 502, 503, 504)
-            retry = requests.adapters.Retry(
-                total=retry_max_requests,
-                connect=retry_max_requests,
-                read=retry_max_requests,
-                backoff_factor=retry_backoff_factor,
-                status_forcelist=retry_status_forcelist,
-            )
-            adapter = requests.adapters.HTTPAdapter(max_retries=retry)
-            if self.use_ssl:
-                session.mount("https://", adapter)
-            else:
-                session.mount("http://", adapter)
+        max_retries = build_retry(server_errors=retry)
+
+        # Size the pool for concurrent uploads and property updates
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=_POOL_SIZE,
+            pool_maxsize=_POOL_SIZE,
+            max_retries=max_retries,
+        )
+        # Mount on both schemes so redirects and absolute `_links` also pool
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
 
         session.auth = (self.user_name, self.api_key)
         if json:
@@ -147,6 +285,8 @@ class ConfluenceApiClient:
 
         Args:
             response : The response from a request
+        Raises:
+            ConfluenceError: for any error other than 404
 
         """
         try:
@@ -156,10 +296,9 @@ class ConfluenceApiClient:
             if response.status_code == 404:
                 return CheckedResponse(404, {"error": "Not Found"})
             else:
-                LOGGER.error("Error: %d - %s", response.status_code, response.content)
-                sys.exit(1)
+                raise ConfluenceError(response.status_code, response.content) from err
 
-        return CheckedResponse(response.status_code, response.json())
+        return CheckedResponse(response.status_code, json.loads(response.content))
 
     def update_page(
         self, page_id: int, title: str, body: str, version: int, parent_id: int
@@ -176,7 +315,7 @@ class ConfluenceApiClient:
         """
         LOGGER.info("Updating page...")
 
-        url = "%s/api/v2/pages/%d" % (self.confluence_api_url, page_id)
+        url = f"{self._pages_url}/{page_id}"
 
         page_json = {
             "id": page_id,
@@ -191,15 +330,18 @@ class ConfluenceApiClient:
 
         session = self.get_session()
         response = self.check_errors_and_get_json(
-            session.put(url, data=json.dumps(page_json))
+            session.put(url, data=encode_json(page_json))
         )
 
         if response.status_code == 404:
             self.log_not_found("Page", {"Page Id": "%d" % page_id})
             return False
 
+        with self._cache_lock:
+            self._page_cache.pop(title, None)
+
         if response.status_code == 200:
-            link = "%s%s" % (self.confluence_api_url, response.data["_links"]["webui"])
+            link = f"{self.confluence_api_url}{response.data['_links']['webui']}"
             LOGGER.info("Page updated successfully.")
             LOGGER.info("URL: %s", link)
             return True
@@ -217,15 +359,23 @@ class ConfluenceApiClient:
         if self.space_id > -1:
             return self.space_id
 
-        url = "%s/api/v2/spaces?keys=%s" % (self.confluence_api_url, self.space_key)
+        # Pages published concurrently share this client; only one of them
+        # needs to look the space up.
+        with self._space_lock:
+            if self.space_id > -1:
+                return self.space_id
 
-        response = self.check_errors_and_get_json(self.get_session().get(url))
+            response = self.check_errors_and_get_json(
+                self.get_session().get(
+                    self._spaces_url, params={"keys": self.space_key}
+                )
+            )
 
-        if response.status_code == 404:
-            self.log_not_found("Space", {"Space Key": self.space_key})
-        else:
-            if len(response.data["results"]) >= 1:
-                self.space_id = int(response.data["results"][0]["id"])
+            if response.status_code == 404:
+                self.log_not_found("Space", {"Space Key": self.space_key})
+            else:
+                if len(response.data["results"]) >= 1:
+                    self.space_id = int(response.data["results"][0]["id"])
 
         return self.space_id
 
@@ -243,7 +393,7 @@ class ConfluenceApiClient:
         """
         LOGGER.info("Creating page...")
 
-        url = "%s/api/v2/pages" % self.confluence_api_url
+        url = self._pages_url
 
         space_id = self.get_space_id()
 
@@ -260,10 +410,10 @@ class ConfluenceApiClient:
             },
         }
 
-        LOGGER.debug("data: %s", json.dumps(new_page))
+        LOGGER.debug("data: %s", new_page)
 
         response = self.check_errors_and_get_json(
-            self.get_session().post(url, data=json.dumps(new_page))
+            self.get_session().post(url, data=encode_json(new_page))
         )
 
         if response.status_code == 200:
@@ -271,12 +421,16 @@ class ConfluenceApiClient:
             space_id = int(data["spaceId"])
             page_id = int(data["id"])
             version = data["version"]["number"]
-            link = "%s%s" % (self.confluence_api_url, data["_links"]["webui"])
+            link = f"{self.confluence_api_url}{data['_links']['webui']}"
 
             LOGGER.info("Page created in SpaceId %d with ID: %d.", space_id, page_id)
             LOGGER.info("URL: %s", link)
 
-            return PageInfo(page_id, space_id, version, link)
+            page = PageInfo(page_id, space_id, version, link)
+            with self._cache_lock:
+                self._page_cache[title] = page
+                self._editor_cache[page_id] = "v%d" % self.editor_version
+            return page
         else:
             LOGGER.error("Could not create page.")
             return PageInfo(0, 0, 0, "")
@@ -289,11 +443,19 @@ class ConfluenceApiClient:
             page_id: confluence page id
         """
         LOGGER.info("Deleting page...")
-        url = "%s/api/v2/pages/%d" % (self.confluence_api_url, page_id)
+        url = f"{self._pages_url}/{page_id}"
 
         response = self.get_session().delete(url)
         response.raise_for_status()
 
+        with self._cache_lock:
+            self._page_cache = {
+                title: page
+                for title, page in self._page_cache.items()
+                if page.id != page_id
+            }
+            self._editor_cache.pop(page_id, None)
+
         if response.status_code == 204:
             LOGGER.info("Page %d deleted successfully.", page_id)
         else:
@@ -308,34 +470,38 @@ class ConfluenceApiClient:
         Returns:
             Confluence page info
         """
+        with self._cache_lock:
+            page = self._page_cache.get(title)
+        if page is not None:
+            return page
 
         space_id = self.get_space_id()
 
         LOGGER.info("\tRetrieving page information: %s", title)
-        url = "%s/api/v2/spaces/%d/pages?title=%s" % (
-            self.confluence_api_url,
-            space_id,
-            urllib.parse.quote_plus(title),
-        )
+        url = f"{self._spaces_url}/{space_id}/pages"
 
-        response = self.check_errors_and_get_json(self.get_session(retry=True).get(url))
+        response = self.check_errors_and_get_json(
+            self.get_session(retry=True).get(url, params={"title": title})
+        )
         if response.status_code == 404:
             self.log_not_found("Page", {"Space Id": "%d" % space_id})
         else:
             data = response.data
 
-            LOGGER.debug("data: %s", str(data))
+            LOGGER.debug("data: %s", data)
 
             if len(data["results"]) >= 1:
                 page_id = int(data["results"][0]["id"])
                 space_id = int(data["results"][0]["spaceId"])
                 version_num = data["results"][0]["version"]["number"]
-                link = "%s%s" % (
-                    self.confluence_api_url,
-                    data["results"][0]["_links"]["webui"],
+                link = (
+                    f"{self.confluence_api_url}"
+                    f"{data['results'][0]['_links']['webui']}"
                 )
 
                 page = PageInfo(page_id, space_id, version_num, link)
+                with self._cache_lock:
+                    self._page_cache[title] = page
                 return page
 
         return PageInfo(0, 0, 0, "")
@@ -351,7 +517,7 @@ class ConfluenceApiClient:
         """
 
         LOGGER.info("\tRetrieving page property information: %d", page_id)
-        url = "%s/api/v2/pages/%d/properties" % (self.confluence_api_url, page_id)
+        url = f"{self._pages_url}/{page_id}/properties"
 
         response = self.check_errors_and_get_json(self.get_session(retry=True).get(url))
         if response.status_code == 404:
@@ -379,11 +545,7 @@ class ConfluenceApiClient:
         }
 
         if "id" in page_property:
-            url = "%s/api/v2/pages/%d/properties/%s" % (
-                self.confluence_api_url,
-                page_id,
-                page_property["id"],
-            )
+            url = f"{self._pages_url}/{page_id}/properties/{page_property['id']}"
             property_json.update({"property-id": page_property["id"]})
             LOGGER.info(
                 "Updating Property ID %s on Page %d: %s=%s",
@@ -393,10 +555,10 @@ class ConfluenceApiClient:
                 property_json["value"],
             )
             response = self.check_errors_and_get_json(
-                self.get_session(retry=True).put(url, data=json.dumps(property_json))
+                self.get_session(retry=True).put(url, data=encode_json(property_json))
             )
         else:
-            url = "%s/api/v2/pages/%d/properties" % (self.confluence_api_url, page_id)
+            url = f"{self._pages_url}/{page_id}/properties"
             LOGGER.info(
                 "Adding Property to Page %s: %s=%s",
                 page_id,
@@ -404,7 +566,7 @@ class ConfluenceApiClient:
                 property_json["value"],
             )
             response = self.check_errors_and_get_json(
-                self.get_session(retry=True).post(url, data=json.dumps(property_json))
+                self.get_session(retry=True).post(url, data=encode_json(property_json))
             )
 
         if response.status_code != 200:
@@ -413,35 +575,107 @@ class ConfluenceApiClient:
             )
             return False
         else:
+            if property_json["key"] == "editor":
+                with self._cache_lock:
+                    self._editor_cache[page_id] = property_json["value"]
             return True
 
-    def get_attachment(self, page_id: int, filename: str) -> str:
+    def get_known_editor(self, page_id: int) -> typing.Optional[str]:
         """
-        Get page attachment
+        Get the editor property last written to a page by this client
 
         Args:
             page_id: confluence page id
-            filename: attachment filename
         Returns:
-            The attachment Id, or -1 if not found
+            The editor value (e.g. "v2"), or None if it is not known
         """
-        url = "%s/api/v2/pages/%d/attachments?filename=%s" % (
-            self.confluence_api_url,
-            page_id,
-            filename,
-        )
+        with self._cache_lock:
+            return self._editor_cache.get(page_id)
 
-        response = self.get_session().get(url)
-        response.raise_for_status()
-        data = response.json()
+    def update_page_properties(
+        self, page_id: int, page_properties: typing.List[typing.Any]
+    ) -> bool:
+        """
+        Update a collection of page properties by page id
 
-        if len(data["results"]) >= 1:
-            att_id = data["results"][0]["id"]
-            return att_id
+        The v2 API has no bulk property endpoint, so the individual
+        updates are issued concurrently.
 
-        return ""
+        Args:
+            page_id: pageId
+            page_properties: properties to add or update
+        Returns:
+            True if all properties were updated successfully
+        """
+        if not page_properties:
+            return True
 
-    def upload_attachment(self, page_id: int, file: str, comment: str) -> bool:
+        workers = min(_MAX_WORKERS, len(page_properties))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(
+                executor.map(
+                    lambda prop: self.update_page_property(page_id, prop),
+                    page_properties,
+                )
+            )
+
+        return all(results)
+
+    def get_attachments(self, page_id: int) -> typing.Dict[str, str]:
+        """
+        Get all attachments of a page
+
+        The listing is fetched once per page and cached, so looking up
+        several files costs a single round trip.
+
+        Args:
+            page_id: confluence page id
+        Returns:
+            A dictionary of attachment filename to attachment Id
+        """
+        with self._cache_lock:
+            attachments = self._attachment_cache.get(page_id)
+        if attachments is not None:
+            return attachments
+
+        attachments = {}
+        url = f"{self._pages_url}/{page_id}/attachments"
+        params = {"limit": 250}
+        while url:
+            response = self.get_session().get(url, params=params)
+            response.raise_for_status()
+            data = json.loads(response.content)
+
+            for attachment in data["results"]:
+                attachments[attachment["title"]] = attachment["id"]
+
+            next_link = data.get("_links", {}).get("next")
+            if next_link:
+                # The next link already carries the cursor and the limit
+                url = urllib.parse.urljoin(self.confluence_api_url, next_link)
+                params = None
+            else:
+                url = None
+
+        with self._cache_lock:
+            self._attachment_cache[page_id] = attachments
+        return attachments
+
+    def get_attachment(self, page_id: int, filename: str) -> str:
+        """
+        Get page attachment
+
+        Args:
+            page_id: confluence page id
+            filename: attachment filename
+        Returns:
+            The attachment Id, or an empty string if not found
+        """
+        return self.get_attachments(page_id).get(filename, "")
+
+    def upload_attachment(
+        self, page_id: int, file: str, comment: str, check_exists: bool = True
+    ) -> bool:
         """
         Upload an attachement
 
@@ -449,64 +683,196 @@ class ConfluenceApiClient:
             page_id: confluence page id
             file: attachment file
             comment: attachment comment
+            check_exists: check that the file exists before uploading it
         Returns:
             True if successful, false otherwise
         """
-        if re.search(r"http.*", file):
+        if file.startswith(_REMOTE_PREFIXES):
             return False
 
-        content_type = mimetypes.guess_type(file)[0]
         filename = os.path.basename(file)
+        content_type = guess_content_type(filename)
+
+        with self._cache_lock:
+            uploaded_path = self._uploaded.get((page_id, filename))
+        if self.is_uploaded(page_id, file, uploaded_path):
+            return True
 
-        if not os.path.isfile(file):
+        if check_exists and not os.path.isfile(file):
             LOGGER.error("File %s cannot be found --> skip ", file)
             return False
 
-        file_to_upload = {
-            "comment": comment,
-            "file": (filename, open(file, "rb"), content_type, {"Expires": "0"}),
-        }
-
         attachment_id = self.get_attachment(page_id, filename)
-        if attachment_id != "":
-            url = "%s/rest/api/content/%d/child/attachment/%s/data" % (
-                self.confluence_api_url,
-                page_id,
-                attachment_id,
-            )
+        new_attachment = attachment_id == ""
+        if not new_attachment:
+            url = f"{self._content_url}/{page_id}/child/attachment/{attachment_id}/data"
         else:
-            url = "%s/rest/api/content/%d/child/attachment/" % (
-                self.confluence_api_url,
-                page_id,
-            )
+            url = f"{self._content_url}/{page_id}/child/attachment/"
 
         session = self.get_session(json=False)
-        session.headers.update({"X-Atlassian-Token": "no-check"})
 
         LOGGER.info("\tUploading attachment %s...", filename)
 
-        response = session.post(url, files=file_to_upload)
+        with open(file, "rb") as file_handle:
+            file_to_upload = {
+                "comment": comment,
+                "file": (filename, file_handle, content_type, {"Expires": "0"}),
+            }
+            response = session.post(
+                url, files=file_to_upload, headers={"X-Atlassian-Token": "no-check"}
+            )
         response.raise_for_status()
 
+        with self._cache_lock:
+            if new_attachment:
+                self._attachment_cache.pop(page_id, None)
+            self._uploaded[(page_id, filename)] = os.path.abspath(file)
+
         return True
 
+    def is_uploaded(
+        self, page_id: int, file: str, uploaded_path: typing.Optional[str]
+    ) -> bool:
+        """
+        Check whether a file's attachment name was already uploaded to a page
+
+        Attachments are named after the file, so a different file with the
+        same name cannot be uploaded as well; a warning is logged for it.
+
+        Args:
+            page_id: confluence page id
+            file: attachment file
+            uploaded_path: path uploaded under the same name, if any
+        Returns:
+            True if an attachment with this name was already uploaded
+        """
+        if uploaded_path is None:
+            return False
+        if uploaded_path != os.path.abspath(file):
+            LOGGER.warning(
+                "Attachment %s skipped: page %d already has %s from %s",
+                file,
+                page_id,
+                os.path.basename(file),
+                uploaded_path,
+            )
+        return True
+
+    def upload_attachments(
+        self, page_id: int, attachments: typing.List[typing.Tuple[str, str]]
+    ) -> bool:
+        """
+        Upload several attachments
+
+        Files that are not attached to the page yet are sent together in a
+        single multipart request.  Files that already exist have to go
+        through the per-attachment data endpoint and are updated
+        concurrently.  A file name already uploaded to the page by this
+        client, e.g. an image that is also listed as an attachment, is
+        skipped.
+
+        Args:
+            page_id: confluence page id
+            attachments: list of (file, comment) tuples
+        Returns:
+            True if every file was uploaded, false otherwise
+        """
+        if not attachments:
+            return True
+
+        success = True
+        new_files = []
+        existing_files = []
+        with self._cache_lock:
+            # Files queued in this call count as uploaded too
+            queued = dict(self._uploaded)
+        for file, comment in attachments:
+            key = (page_id, os.path.basename(file))
+            if self.is_uploaded(page_id, file, queued.get(key)):
+                continue
+            if file.startswith(_REMOTE_PREFIXES):
+                success = False
+            elif not os.path.isfile(file):
+                LOGGER.error("File %s cannot be found --> skip ", file)
+                success = False
+            elif self.get_attachment(page_id, key[1]) != "":
+                existing_files.append((file, comment))
+                queued[key] = os.path.abspath(file)
+            else:
+                new_files.append((file, comment))
+                queued[key] = os.path.abspath(file)
+
+        if new_files:
+            url = f"{self._content_url}/{page_id}/child/attachment/"
+            with contextlib.ExitStack() as stack:
+                files_to_upload = []
+                for file, comment in new_files:
+                    filename = os.path.basename(file)
+                    LOGGER.info("\tUploading attachment %s...", filename)
+                    files_to_upload.append(
+                        (
+                            "file",
+                            (
+                                filename,
+                                stack.enter_context(open(file, "rb")),
+                                guess_content_type(filename),
+                                {"Expires": "0"},
+                            ),
+                        )
+                    )
+                    files_to_upload.append(("comment", (None, comment)))
+
+                response = self.get_session(json=False).post(
+                    url,
+                    files=files_to_upload,
+                    headers={"X-Atlassian-Token": "no-check"},
+                )
+                response.raise_for_status()
+
+            # The new attachment ids are only known to the server
+            with self._cache_lock:
+                self._attachment_cache.pop(page_id, None)
+                self._uploaded.update(
+                    ((page_id, os.path.basename(file)), os.path.abspath(file))
+                    for file, _ in new_files
+                )
+
+        if existing_files:
+            workers = min(_MAX_WORKERS, len(existing_files))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = executor.map(
+                    lambda upload: self.upload_attachment(
+                        page_id, *upload, check_exists=False
+                    ),
+                    existing_files,
+                )
+                success = all(results) and success
+
+        return success
+
     def get_label_info(self, label_name: str) -> LabelInfo:
         """
         Get label information for the given label name
 
+        Lookups are cached, so a label shared by several pages is only
+        queried once.
+
         Args:
             label_name: pageId
         Returns:
             LabelInfo.  If not found, labelInfo will be 0
         """
+        with self._cache_lock:
+            label = self._label_cache.get(label_name)
+        if label is not None:
+            return label
 
         LOGGER.debug("\tRetrieving label information: %s", label_name)
-        url = "%s/rest/api/label?name=%s" % (
-            self.confluence_api_url,
-            urllib.parse.quote_plus(label_name),
-        )
+        url = f"{self.confluence_api_url}/rest/api/label"
 
-        response = self.check_errors_and_get_json(self.get_session().get(url))
+        response = self.check_errors_and_get_json(
+            self.get_session().get(url, params={"name": label_name})
+        )
 
         if response.status_code == 404:
             label = LabelInfo(0, "", "", "")
@@ -519,6 +885,8 @@ class ConfluenceApiClient:
                 data["label"],
             )
 
+        with self._cache_lock:
+            self._label_cache[label_name] = label
         return label
 
     def add_label(self, page_id: int, label_name: str) -> bool:
@@ -539,9 +907,9 @@ class ConfluenceApiClient:
 
         add_label_json = {"prefix": prefix, "name": label_name}
 
-        url = "%s/rest/api/content/%d/label" % (self.confluence_api_url, page_id)
+        url = f"{self._content_url}/{page_id}/label"
 
-        response = self.get_session().post(url, data=json.dumps(add_label_json))
+        response = self.get_session().post(url, data=encode_json(add_label_json))
         response.raise_for_status()
         return True
 
@@ -557,7 +925,7 @@ class ConfluenceApiClient:
         """
 
         LOGGER.info("\tRetrieving page property information: %d", page_id)
-        url = "%s/api/v2/pages/%d/labels" % (self.confluence_api_url, page_id)
+        url = f"{self._pages_url}/{page_id}/labels"
 
         response = self.check_errors_and_get_json(self.get_session(retry=True).get(url))
         if response.status_code == 404:
@@ -569,16 +937,22 @@ class ConfluenceApiClient:
             return False
 
         data = response.data
-        for label in labels:
-            found = False
-            for existing_label in data["results"]:
-                if label == existing_label["name"]:
-                    found = True
-
-            if not found:
+        LOGGER.debug("property data: %s", data["results"])
+
+        existing_labels = {existing["name"] for existing in data["results"]}
+        labels_to_add = [
+            label for label in dict.fromkeys(labels) if label not in existing_labels
+        ]
+        if labels_to_add:
+            for label in labels_to_add:
                 LOGGER.info("Adding Label '%s' to Page Id %d", label, page_id)
-                self.add_label(page_id, label)
 
-            LOGGER.debug("property data: %s", str(data["results"]))
+            workers = min(_MAX_WORKERS, len(labels_to_add))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                list(
+                    executor.map(
+                        lambda label: self.add_label(page_id, label), labels_to_add
+                    )
+                )
 
         return data["results"]
@@ -2,11 +2,35 @@ import logging
 import typing
 import os
 import re
+from html import escape, unescape
+from html.parser import HTMLParser
 from .client import ConfluenceApiClient
 from .converter import MarkdownConverter
 
 LOGGER = logging.getLogger(__name__)
 
+_IMG_SRC_RE = re.compile(r'(<img\b[^>]*?\ssrc=")([^"]*)')
+_REMOTE_PREFIXES = ("http://", "https://")
+_HEADER_RE = re.compile(r"<h\d+>(.*?)</h\d+>", re.DOTALL)
+
+_REF_PREFIXES = {"default": "#", "bitbucket": "#markdown-header-"}
+_REF_POSTFIXES = {"default": "_%d", "bitbucket": "_%d"}
+
+
+class _ImageCollector(HTMLParser):
+    """
+    Collects the attributes of every `img` tag in a single scan of the HTML
+
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.images: typing.List[typing.Dict[str, str]] = []
+
+    def handle_starttag(self, tag: str, attrs: typing.List[typing.Tuple[str, str]]):
+        if tag == "img":
+            self.images.append(dict(attrs))
+
 
 class ConfluenceConverter:
     def __init__(
@@ -21,12 +45,14 @@ class ConfluenceConverter:
         api_key: str,
         ancestor: str,
         version: int,
+        confluence_client: typing.Optional[ConfluenceApiClient] = None,
     ):
         """
         Constructor
 
         Args:
-            client: An instance of the confluence client
+            confluence_client: An existing client to share between pages.
+                A new client is created when omitted.
         """
         self.file: str = file
         self.md_source: str = md_source
@@ -38,9 +64,10 @@ class ConfluenceConverter:
         self.version = version
         self.ancestor: str = ancestor
         self.title: str = title
+        self.confluence_api_url: str = self.get_confluence_api_url()
 
         self.space_key: str = self.get_space_key(space_key)
-        self.confluence_client = self.get_client()
+        self.confluence_client = confluence_client or self.get_client()
 
     def convert(
         self,
@@ -52,17 +79,22 @@ class ConfluenceConverter:
         properties: dict,
         attachments: typing.List[str],
     ):
+        with open(self.file, "r", encoding="utf-8-sig") as mdfile:
+            md_content = mdfile.read()
+
         converter = MarkdownConverter(
-            self.file, self.get_confluence_api_url(), self.md_source, self.version
+            self.file,
+            self.confluence_api_url,
+            self.md_source,
+            self.version,
+            md_content,
         )
 
         if self.title is not None:
             title = self.title
             has_title = True
         else:
-            with open(self.file, "r") as mdfile:
-                title = mdfile.readline().lstrip("#").strip()
-                mdfile.seek(0)
+            title = md_content.partition("\n")[0].lstrip("#").strip()
             has_title = False
 
         html = converter.convert_md_to_conf_html(
@@ -80,14 +112,19 @@ class ConfluenceConverter:
         LOGGER.info("Checking if Atlas page exists...")
         page = self.confluence_client.get_page(title)
 
-        if delete and page is not None and page.id > 0:
-            self.client.delete_page(page.id)
+        if delete:
+            if page.id > 0:
+                self.confluence_client.delete_page(page.id)
+            else:
+                LOGGER.error("Error: Page does not exist: %s", title)
             return
 
         parent_page_id = self.get_parent_page()
 
         if page.id == 0:
             page = self.confluence_client.create_page(title, html, parent_page_id)
+            if page.id == 0:
+                return
 
         LOGGER.info("Page Id %d" % page.id)
         html = self.add_images(page.id, html)
@@ -105,8 +142,9 @@ class ConfluenceConverter:
                 "Updating %s page content properties..." % len(properties_for_update)
             )
 
-            for prop in properties_for_update:
-                self.confluence_client.update_page_property(page.id, prop)
+            self.confluence_client.update_page_properties(
+                page.id, properties_for_update
+            )
 
         if labels is not None and len(labels) > 0:
             self.confluence_client.update_labels(page.id, labels)
@@ -125,11 +163,10 @@ class ConfluenceConverter:
             page_id: Confluence page id
             files: list of files to attach to the given Confluence page
         """
-        if files:
-            for file in files:
-                self.confluence_client.upload_attachment(
-                    page_id, os.path.join(self.source_folder, file), ""
-                )
+        self.confluence_client.upload_attachments(
+            page_id,
+            [(os.path.join(self.source_folder, file), "") for file in files],
+        )
 
     def add_images(self, page_id: int, html: str) -> str:
         """
@@ -142,24 +179,42 @@ class ConfluenceConverter:
         Returns:
             html with modified image reference
         """
-        for tag in re.findall(r"<img(.*?)\/>", html):
-            rel_path = re.search(r'src="(.*?)"', tag).group(1)
-            alt_text = re.search(r'alt="(.*?)"', tag).group(1)
+        if self.confluence_api_url.endswith("/wiki"):
+            prefix = "/wiki/download/attachments/%d/" % page_id
+        else:
+            prefix = "/download/attachments/%d/" % page_id
+
+        uploads = []
+        rewrites = {}
+        collector = _ImageCollector()
+        collector.feed(html)
+        collector.close()
+
+        for image in collector.images:
+            rel_path = image.get("src")
+            # Remote images are linked as-is, repeated images are uploaded once
+            if (
+                not rel_path
+                or rel_path.startswith(_REMOTE_PREFIXES)
+                or rel_path in rewrites
+            ):
+                continue
             abs_path = os.path.join(self.source_folder, rel_path)
-            basename = os.path.basename(rel_path)
-            self.confluence_client.upload_attachment(page_id, abs_path, alt_text)
-            if re.search(r"http.*", rel_path) is None:
-                if self.get_confluence_api_url().endswith("/wiki"):
-                    html = html.replace(
-                        "%s" % (rel_path),
-                        "/wiki/download/attachments/%d/%s" % (page_id, basename),
-                    )
-                else:
-                    html = html.replace(
-                        "%s" % (rel_path),
-                        "/download/attachments/%d/%s" % (page_id, basename),
-                    )
-        return html
+            uploads.append((abs_path, image.get("alt") or ""))
+            rewrites[rel_path] = prefix + os.path.basename(rel_path)
+
+        self.confluence_client.upload_attachments(page_id, uploads)
+
+        if not rewrites:
+            return html
+
+        def rewrite_src(match: re.Match) -> str:
+            new_path = rewrites.get(unescape(match.group(2)))
+            if new_path is None:
+                return match.group(0)
+            return match.group(1) + escape(new_path)
+
+        return _IMG_SRC_RE.sub(rewrite_src, html)
 
     def add_local_refs(
         self,
@@ -181,12 +236,8 @@ class ConfluenceConverter:
         Returns:
             modified html string
         """
-        LOGGER = logging.getLogger(__name__)
-        ref_prefixes = {"default": "#", "bitbucket": "#markdown-header-"}
-        ref_postfixes = {"default": "_%d", "bitbucket": "_%d"}
-
         # We ignore local references in case of unknown or unspecified markdown source
-        if self.md_source not in ref_prefixes or self.md_source not in ref_postfixes:
+        if self.md_source not in _REF_PREFIXES or self.md_source not in _REF_POSTFIXES:
             LOGGER.warning(
                 "Local references weren't"
                 "processed because "
@@ -196,26 +247,22 @@ class ConfluenceConverter:
             )
             return html
 
-        ref_prefix = ref_prefixes[self.md_source]
-        ref_postfix = ref_postfixes[self.md_source]
+        # Cheap substring checks before any regex work: no anchors, nothing to do
+        if 'href="#' not in html or "<h" not in html:
+            return html
 
-        LOGGER.info("Converting confluence local links...")
+        ref_prefix = _REF_PREFIXES[self.md_source]
+        ref_postfix = _REF_POSTFIXES[self.md_source]
 
-        headers = re.findall(r"<h\d+>(.*?)</h\d+>", html, re.DOTALL)
+        LOGGER.info("Converting confluence local links...")
 
+        headers = _HEADER_RE.findall(html)
         if not headers:
             return html
 
         headers_map = converter.process_headers(ref_prefix, ref_postfix, headers)
 
-        links = re.findall(r'<a href="#.+?">.+?</a>', html)
-
-        if not links:
-            return html
-
-        html = converter.process_links(
-            html, links, headers_map, space_id, page_id, title
-        )
+        html = converter.process_links(html, headers_map, space_id, page_id, title)
 
         return html
 
@@ -228,61 +275,53 @@ class ConfluenceConverter:
         Returns:
             array of properties to update
         """
+        editor = "v%d" % self.version
+        # Nothing to set and the editor was written by this run: skip the lookup
+        if not props and self.confluence_client.get_known_editor(page_id) == editor:
+            return []
+
         properties = self.confluence_client.get_page_properties(page_id)
+        existing_by_key = {prop["key"]: prop for prop in properties}
+
+        updates = {}
+        # Change the editor version
+        if "editor" in existing_by_key:
+            updates["editor"] = editor
+
+        if props:
+            updates.update(props)
+
         properties_for_update = []
-        for existing_prop in properties:
-            # Change the editor version
-            if existing_prop["key"] == "editor" and existing_prop["value"] != (
-                "v%d" % self.version
-            ):
+        for key, value in updates.items():
+            existing_prop = existing_by_key.get(key)
+            if existing_prop is not None:
+                if existing_prop["value"] == value:
+                    continue
                 properties_for_update.append(
                     {
-                        "key": "editor",
+                        "key": key,
                         "version": existing_prop["version"]["number"] + 1,
-                        "value": ("v%d" % self.version),
+                        "value": value,
                         "id": existing_prop["id"],
                     }
                 )
-
-        if not props:
-            return properties_for_update
-
-        for key in props:
-            found = False
-            for existing_prop in properties:
-                if existing_prop["key"] == key:
-                    properties_for_update.append(
-                        {
-                            "key": key,
-                            "version": existing_prop["version"]["number"] + 1,
-                            "value": props[key],
-                            "id": existing_prop["id"],
-                        }
-                    )
-                    found = True
-            if not found:
-                properties_for_update.append(
-                    {"key": key, "version": 1, "value": props[key]}
-                )
+            else:
+                properties_for_update.append({"key": key, "version": 1, "value": value})
 
         return properties_for_update
 
     def get_confluence_api_url(self) -> str:
-        url = ""
-        if self.org_name is not None:
-            if self.org_name.find(".") != -1:
-                url = "https://%s" % self.org_name
-            else:
-                url = "https://%s.atlassian.net/wiki" % self.org_name
-        if not self.use_ssl:
-            url.replace("https://", "http://")
-        return url
+        if self.org_name is None:
+            return ""
 
-    def get_client(self) -> ConfluenceApiClient:
-        url = self.get_confluence_api_url()
+        scheme = "https" if self.use_ssl else "http"
+        if "." in self.org_name:
+            return "%s://%s" % (scheme, self.org_name)
+        return "%s://%s.atlassian.net/wiki" % (scheme, self.org_name)
 
+    def get_client(self) -> ConfluenceApiClient:
         return ConfluenceApiClient(
-            url,
+            self.confluence_api_url,
             self.user_name,
             self.api_key,
             self.space_key,
@@ -300,9 +339,8 @@ class ConfluenceConverter:
         parent_page_id = 0
         if self.ancestor:
             parent_page = self.confluence_client.get_page(self.ancestor)
-            if parent_page:
+            if parent_page.id > 0:
                 parent_page_id = parent_page.id
             else:
                 LOGGER.error("Error: Parent page does not exist: %s", self.ancestor)
-                parent_page_id = 0
         return parent_page_id
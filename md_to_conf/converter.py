@@ -1,11 +1,184 @@
+import functools
 import logging
 import re
-import codecs
+import threading
 import markdown
 import typing
 
 LOGGER = logging.getLogger(__name__)
 
+_MARKDOWN_EXTENSIONS = ["tables", "fenced_code", "footnotes", "mdx_truly_sane_lists"]
+# Extensions loaded for every document
+_ALWAYS_ON_EXTENSIONS = ("mdx_truly_sane_lists",)
+# Extensions that only matter when one of their markers is in the source
+_EXTENSION_MARKERS = {
+    "tables": ("|",),
+    "fenced_code": ("```", "~~~"),
+    "footnotes": ("[^",),
+}
+_MARKDOWN = threading.local()
+
+_HEADER_STRIP_RE = re.compile(r"(<.+>| )")
+_LOCAL_LINK_RE = re.compile(r'<a href="(#[^"]+)">(.+?)</a>')
+_LINK_TEXT_TAGS_RE = re.compile(r"( *<.+> *)")
+
+# Groups: language (if any) and the escaped code
+_CODE_BLOCK_RE = re.compile(
+    r'<pre><code(?: class="language-([^"]*)")?[^>]*>(.*?)</code></pre>', re.DOTALL
+)
+_CODE_ENTITY_RE = re.compile("&(lt|gt|quot|amp);")
+_CODE_ENTITIES = {"lt": "<", "gt": ">", "quot": '"', "amp": "&"}
+_CODE_MACRO_START = (
+    '<ac:structured-macro ac:name="code">'
+    '<ac:parameter ac:name="theme">Midnight</ac:parameter>'
+    '<ac:parameter ac:name="linenumbers">true</ac:parameter>'
+)
+
+_BLOCKQUOTE_RE = re.compile("<blockquote>(.*?)</blockquote>", re.DOTALL)
+_INFO_TAG = '<p><ac:structured-macro ac:name="info"><ac:rich-text-body><p>'
+_NOTE_TAG = _INFO_TAG.replace("info", "note")
+_WARNING_TAG = _INFO_TAG.replace("info", "warning")
+_MACRO_CLOSE_TAG = "</p></ac:rich-text-body></ac:structured-macro></p>"
+_QUOTE_TYPE_TAGS = {"Note": _NOTE_TAG, "Warning": _WARNING_TAG}
+
+_COMMENT_DELIMITER_RE = re.compile("<!--|-->")
+_COMMENT_PLACEHOLDER_TAGS = {"<!--": "<ac:placeholder>", "-->": "</ac:placeholder>"}
+# Custom ~? info ?~, ~! note !~ and ~% warning %~ markers
+_MACRO_MARKER_RE = re.compile(r"<p>~([?!%])|[?!%]~</p>")
+_MACRO_OPEN_TAGS = {"?": _INFO_TAG, "!": _NOTE_TAG, "%": _WARNING_TAG}
+# A Note label anywhere on the first line wins over a Warning label
+_QUOTE_TYPE_RE = re.compile(
+    "^(?:<.*>(?P<Note>Note)|<.*>(?P<Warning>Warning))", re.IGNORECASE
+)
+_TAG_START_RE = re.compile("<[^>]*>")
+_DOCTOC_RE = re.compile(r"\<\!\-\- START doctoc.*END doctoc \-\-\>", re.DOTALL)
+
+_TOC_MACRO = '<p><ac:structured-macro ac:name="toc" ac:schema-version="1"/></p>'
+_DOCTOC_MACRO = """<p>
+        <ac:structured-macro ac:name="toc">
+        <ac:parameter ac:name="printable">true</ac:parameter>
+        <ac:parameter ac:name="style">disc</ac:parameter>
+        <ac:parameter ac:name="maxLevel">7</ac:parameter>
+        <ac:parameter ac:name="minLevel">1</ac:parameter>
+        <ac:parameter ac:name="type">list</ac:parameter>
+        <ac:parameter ac:name="outline">clear</ac:parameter>
+        <ac:parameter ac:name="include">.*</ac:parameter>
+        </ac:structured-macro>
+        </p>"""
+# Doctoc blocks and comment delimiters are rewritten in one pass
+_DOCTOC_OR_COMMENT_RE = re.compile(
+    r"(?P<doctoc>%s)|<!--|-->" % _DOCTOC_RE.pattern, re.DOTALL
+)
+_CONTENTS_MACRO = (
+    '<ac:structured-macro ac:name="toc">\n'
+    '<ac:parameter ac:name="printable">true</ac:parameter>\n'
+    '<ac:parameter ac:name="style">disc</ac:parameter>'
+    '<ac:parameter ac:name="maxLevel">5</ac:parameter>\n'
+    '<ac:parameter ac:name="minLevel">1</ac:parameter>'
+    '<ac:parameter ac:name="class">rm-contents</ac:parameter>\n'
+    '<ac:parameter ac:name="exclude"></ac:parameter>\n'
+    '<ac:parameter ac:name="type">list</ac:parameter>'
+    '<ac:parameter ac:name="outline">false</ac:parameter>\n'
+    '<ac:parameter ac:name="include"></ac:parameter>\n'
+    "</ac:structured-macro>"
+)
+
+_EMOJI_RANGES = (
+    (0x1F600, 0x1F64F),  # emoticons
+    (0x1F300, 0x1F5FF),  # symbols & pictographs
+    (0x1F680, 0x1F6FF),  # transport & map symbols
+    (0x1F1E0, 0x1F1FF),  # flags (iOS)
+    (0x1F900, 0x1F9FF),  # supplemental symbols & pictographs
+    (0x1FA00, 0x1FAFF),  # symbols & pictographs extended-A
+)
+
+_SLUG_STRIP_RE = re.compile(r"<[^>]+>|&[a-z]+;|[^a-zA-Z0-9 -]")
+
+_REFS_RE = re.compile(r"\n(\[\^(\d)\].*)|<p>(\[\^(\d)\].*)")
+_HREF_RE = re.compile('href="(.*?)"')
+_REF_MARKER_RE = re.compile(r"\[\^(\d)\]")
+
+
+@functools.lru_cache(maxsize=1)
+def emoji_table() -> typing.Dict[int, None]:
+    """
+    Build the `str.translate` table deleting the emoji code points
+
+    Returns:
+        translation table mapping every emoji code point to None
+    """
+    return dict.fromkeys(
+        code_point for low, high in _EMOJI_RANGES for code_point in range(low, high + 1)
+    )
+
+
+def markdown_extensions(markdown_content: str) -> typing.Tuple[str, ...]:
+    """
+    Select the extensions a document needs
+
+    Table, fenced code and footnote processing is skipped when the document
+    has none of their markers, since they cannot change its output.
+
+    Args:
+        markdown_content: Markdown text
+    Returns:
+        names of the extensions to load
+    """
+    return tuple(
+        extension
+        for extension in _MARKDOWN_EXTENSIONS
+        if extension in _ALWAYS_ON_EXTENSIONS
+        or any(marker in markdown_content for marker in _EXTENSION_MARKERS[extension])
+    )
+
+
+def get_markdown(
+    extensions: typing.Tuple[str, ...] = tuple(_MARKDOWN_EXTENSIONS)
+) -> markdown.Markdown:
+    """
+    Get the `Markdown` instance for the current thread
+
+    Loading the extensions is the expensive part of a conversion, so each
+    thread builds one instance per set of extensions and resets it between
+    documents. Instances are not shared between threads because they hold
+    per-document state while converting.
+
+    Args:
+        extensions: names of the extensions to load
+    Returns:
+        A `Markdown` instance with the given extensions loaded
+    """
+    instances = getattr(_MARKDOWN, "instances", None)
+    if instances is None:
+        instances = _MARKDOWN.instances = {}
+    md = instances.get(extensions)
+    if md is None:
+        md = instances[extensions] = markdown.Markdown(extensions=list(extensions))
+    return md
+
+
+@functools.lru_cache(maxsize=8)
+def strip_type_re(tagtype: str) -> re.Pattern:
+    """
+    Build the pattern matching a "Note:" style type label in a block quote
+
+    Matches `Type: `, `Type : ` and the same wrapped in `em` or `strong`
+    tags with the colon inside or outside the tag, in any letter case. Only
+    a label opening the quote matches; the tags before it are kept as `open`.
+
+    Args:
+        tagtype: tag type, e.g. `Note`
+    Returns:
+        compiled pattern
+    """
+    tagtype = re.escape(tagtype)
+    return re.compile(
+        r"^(?P<open>(?:<(?:blockquote|p)>\s*)*)"
+        r"(?:%s\s?:\s|<(?:em|strong)>%s\s?(?::<[^>]*>\s|<[^>]*>:\s))"
+        % (tagtype, tagtype),
+        re.IGNORECASE,
+    )
+
 
 class MarkdownConverter:
     """
@@ -15,7 +188,14 @@ class MarkdownConverter:
 
     """
 
-    def __init__(self, md_file: str, api_url: str, md_source: str, editor_version: int):
+    def __init__(
+        self,
+        md_file: str,
+        api_url: str,
+        md_source: str,
+        editor_version: int,
+        md_content: typing.Optional[str] = None,
+    ):
         """
         Constructor
 
@@ -24,18 +204,28 @@ class MarkdownConverter:
             api_url: Path the the Confluence API, used to build link urls
             md_source: MD Source format: current choices are `default` and `bitbucket`
             editor_version: Version to use for the editor
+            md_content: Markdown already read from `md_file`, if available
         """
         self.md_file = md_file
         self.api_url = api_url
         self.md_source = md_source
         self.editor_version = editor_version
+        self.md_content = md_content
+
+        # The editor version never changes, so pick its anchor formats once
+        self._header_value = (
+            self._header_value_v1 if editor_version == 1 else self._header_value_v2
+        )
+        self._link_macro = {1: self._link_macro_v1, 2: self._link_macro_v2}.get(
+            editor_version
+        )
 
     def convert_md_to_conf_html(
         self,
         has_title: bool = False,
         remove_emojies: bool = False,
         add_contents: bool = False,
-    ):
+    ) -> str:
         """
         Convert the Markdown file to Confluence HTML
 
@@ -49,11 +239,13 @@ class MarkdownConverter:
         """
         html = self.get_html_from_markdown()
         if not has_title:
-            html = "\n".join(html.split("\n")[1:])
+            # The first line is the title, so drop it from the body
+            html = html.partition("\n")[2]
 
+        # Each conversion returns early when its markup is absent from the page
         html = self.create_table_of_content(html)
         html = self.convert_info_macros(html)
-        html = self.convert_comment_block(html)
+        html = self.convert_doctoc_and_comments(html)
         html = self.convert_code_block(html)
 
         if remove_emojies:
@@ -73,20 +265,38 @@ class MarkdownConverter:
         Returns:
             A string representing HTML for the Markdown page
         """
-        with codecs.open(self.md_file, "r", "utf-8") as mdfile:
-            markdown_content = mdfile.read()
-            html = markdown.markdown(
-                markdown_content,
-                extensions=[
-                    "tables",
-                    "fenced_code",
-                    "footnotes",
-                    "mdx_truly_sane_lists",
-                ],
-            )
+        markdown_content = self.md_content
+        if markdown_content is None:
+            with open(self.md_file, "r", encoding="utf-8-sig") as mdfile:
+                markdown_content = mdfile.read()
+
+        md = get_markdown(markdown_extensions(markdown_content))
+        html = md.reset().convert(markdown_content)
 
         return html
 
+    def convert_doctoc_and_comments(self, html: str) -> str:
+        """
+        Convert doctoc blocks and comments in a single pass
+
+        Runs after `convert_info_macros`, where the doctoc and comment
+        conversions used to run one after the other.
+
+        Args:
+            html: string
+        Returns:
+            modified html string
+        """
+        if "<!--" not in html and "-->" not in html:
+            return html
+
+        def replace(match: re.Match) -> str:
+            if match.group("doctoc"):
+                return _DOCTOC_MACRO
+            return _COMMENT_PLACEHOLDER_TAGS[match.group(0)]
+
+        return _DOCTOC_OR_COMMENT_RE.sub(replace, html)
+
     def convert_comment_block(self, html: str) -> str:
         """
         Convert markdown code bloc to Confluence hidden comment
@@ -96,10 +306,9 @@ class MarkdownConverter:
         Returns:
             modified html string
         """
-        open_tag = "<ac:placeholder>"
-        close_tag = "</ac:placeholder>"
-        html = html.replace("<!--", open_tag).replace("-->", close_tag)
-        return html
+        return _COMMENT_DELIMITER_RE.sub(
+            lambda delimiter: _COMMENT_PLACEHOLDER_TAGS[delimiter.group(0)], html
+        )
 
     def create_table_of_content(self, html: str) -> str:
         """
@@ -111,13 +320,10 @@ class MarkdownConverter:
         Returns:
             modified html string
         """
-        html = str.replace(
-            html,
-            r"<p>[TOC]</p>",
-            '<p><ac:structured-macro ac:name="toc" ac:schema-version="1"/></p>',
-        )
+        if "[TOC]" not in html:
+            return html
 
-        return html
+        return html.replace("<p>[TOC]</p>", _TOC_MACRO)
 
     def convert_code_block(self, html: str) -> str:
         """
@@ -128,46 +334,34 @@ class MarkdownConverter:
         Returns:
             modified html string
         """
+        if "<pre><code" not in html:
+            return html
+
         LOGGER.debug("HTML pre code block")
         LOGGER.debug(html)
-        code_blocks = re.findall(r"<pre><code.*?>.*?</code></pre>", html, re.DOTALL)
-        if code_blocks:
-            for tag in code_blocks:
-                conf_ml = '<ac:structured-macro ac:name="code">'
-                conf_ml = (
-                    conf_ml + '<ac:parameter ac:name="theme">Midnight</ac:parameter>'
-                )
-                conf_ml = (
-                    conf_ml + '<ac:parameter ac:name="linenumbers">true</ac:parameter>'
-                )
-
-                lang = re.search('code class="language-(.*)"', tag)
-                if lang:
-                    lang = lang.group(1)
-                else:
-                    lang = "none"
-
-                conf_ml = (
-                    conf_ml
-                    + '<ac:parameter ac:name="language">'
-                    + lang
-                    + "</ac:parameter>"
-                )
-                content = re.search(
-                    r"<pre><code.*?>(.*?)</code></pre>", tag, re.DOTALL
-                ).group(1)
-                content = (
-                    "<ac:plain-text-body><![CDATA["
-                    + content
-                    + "]]></ac:plain-text-body>"
-                )
-                conf_ml = conf_ml + content + "</ac:structured-macro>"
-                conf_ml = conf_ml.replace("&lt;", "<").replace("&gt;", ">")
-                conf_ml = conf_ml.replace("&quot;", '"').replace("&amp;", "&")
-
-                html = html.replace(tag, conf_ml)
+        return _CODE_BLOCK_RE.sub(self.code_block_macro, html)
 
-        return html
+    def code_block_macro(self, match: re.Match) -> str:
+        """
+        Build the Confluence code macro for a matched html code block
+
+        Args:
+            match: `_CODE_BLOCK_RE` match with the language and code groups
+        Returns:
+            Confluence code macro
+        """
+        lang = match.group(1) or "none"
+        # Code is sent as CDATA, so the escaped characters are restored
+        content = _CODE_ENTITY_RE.sub(
+            lambda entity: _CODE_ENTITIES[entity.group(1)], match.group(2)
+        )
+
+        return (
+            f"{_CODE_MACRO_START}"
+            f'<ac:parameter ac:name="language">{lang}</ac:parameter>'
+            f"<ac:plain-text-body><![CDATA[{content}]]></ac:plain-text-body>"
+            "</ac:structured-macro>"
+        )
 
     def remove_emojies(self, html: str) -> str:
         """
@@ -178,16 +372,10 @@ class MarkdownConverter:
         Returns:
             modified html string
         """
-        regrex_pattern = re.compile(
-            pattern="["
-            "\U0001F600-\U0001F64F"  # emoticons
-            "\U0001F300-\U0001F5FF"  # symbols & pictographs
-            "\U0001F680-\U0001F6FF"  # transport & map symbols
-            "\U0001F1E0-\U0001F1FF"  # flags (iOS)
-            "]+",
-            flags=re.UNICODE,
-        )
-        return regrex_pattern.sub(r"", html)
+        # Emojies are outside ASCII, so most pages can skip the scan entirely
+        if html.isascii():
+            return html
+        return html.translate(emoji_table())
 
     def convert_info_macros(self, html: str) -> str:
         """
@@ -198,51 +386,41 @@ class MarkdownConverter:
         Returns:
             modified html string
         """
-        info_tag = '<p><ac:structured-macro ac:name="info"><ac:rich-text-body><p>'
-        note_tag = info_tag.replace("info", "note")
-        warning_tag = info_tag.replace("info", "warning")
-        close_tag = "</p></ac:rich-text-body></ac:structured-macro></p>"
-
         # Custom tags converted into macros
-        html = html.replace("<p>~?", info_tag).replace("?~</p>", close_tag)
-        html = html.replace("<p>~!", note_tag).replace("!~</p>", close_tag)
-        html = html.replace("<p>~%", warning_tag).replace("%~</p>", close_tag)
+        if "~" in html:
+            html = _MACRO_MARKER_RE.sub(
+                lambda marker: _MACRO_OPEN_TAGS[marker.group(1)]
+                if marker.group(1)
+                else _MACRO_CLOSE_TAG,
+                html,
+            )
 
         # Convert block quotes into macros
-        quotes = re.findall("<blockquote>(.*?)</blockquote>", html, re.DOTALL)
-        if quotes:
-            for quote in quotes:
-                note = re.search("^<.*>Note", quote.strip(), re.IGNORECASE)
-                warning = re.search("^<.*>Warning", quote.strip(), re.IGNORECASE)
-
-                if note:
-                    clean_tag = self.strip_type(quote, "Note")
-                    macro_tag = (
-                        clean_tag.replace("<p>", note_tag)
-                        .replace("</p>", close_tag)
-                        .strip()
-                    )
-                elif warning:
-                    clean_tag = self.strip_type(quote, "Warning")
-                    macro_tag = (
-                        clean_tag.replace("<p>", warning_tag)
-                        .replace("</p>", close_tag)
-                        .strip()
-                    )
-                else:
-                    macro_tag = (
-                        quote.replace("<p>", info_tag)
-                        .replace("</p>", close_tag)
-                        .strip()
-                    )
-
-                html = html.replace("<blockquote>%s</blockquote>" % quote, macro_tag)
-
-        # Convert doctoc to toc confluence macro
-        html = self.convert_doctoc(html)
+        if "<blockquote>" in html:
+            html = _BLOCKQUOTE_RE.sub(self.blockquote_macro, html)
 
         return html
 
+    def blockquote_macro(self, match: re.Match) -> str:
+        """
+        Build the info, note or warning macro for a matched block quote
+
+        Args:
+            match: `_BLOCKQUOTE_RE` match with the quote content
+        Returns:
+            Confluence macro html
+        """
+        quote = match.group(1)
+
+        quote_type = _QUOTE_TYPE_RE.search(quote.strip())
+        if quote_type:
+            quote = self.strip_type(quote, quote_type.lastgroup)
+            open_tag = _QUOTE_TYPE_TAGS[quote_type.lastgroup]
+        else:
+            open_tag = _INFO_TAG
+
+        return quote.replace("<p>", open_tag).replace("</p>", _MACRO_CLOSE_TAG).strip()
+
     def convert_doctoc(self, html: str) -> str:
         """
         Convert doctoc to confluence macro
@@ -252,22 +430,7 @@ class MarkdownConverter:
         Returns:
             modified html string
         """
-
-        toc_tag = """<p>
-        <ac:structured-macro ac:name="toc">
-        <ac:parameter ac:name="printable">true</ac:parameter>
-        <ac:parameter ac:name="style">disc</ac:parameter>
-        <ac:parameter ac:name="maxLevel">7</ac:parameter>
-        <ac:parameter ac:name="minLevel">1</ac:parameter>
-        <ac:parameter ac:name="type">list</ac:parameter>
-        <ac:parameter ac:name="outline">clear</ac:parameter>
-        <ac:parameter ac:name="include">.*</ac:parameter>
-        </ac:structured-macro>
-        </p>"""
-
-        html = re.sub(
-            r"\<\!\-\- START doctoc.*END doctoc \-\-\>", toc_tag, html, flags=re.DOTALL
-        )
+        html = _DOCTOC_RE.sub(_DOCTOC_MACRO, html)
 
         return html
 
@@ -281,15 +444,8 @@ class MarkdownConverter:
         Returns:
             modified tag
         """
-        tag = re.sub(r"%s:\s" % tagtype, "", tag.strip(), re.IGNORECASE)
-        tag = re.sub(r"%s\s:\s" % tagtype, "", tag.strip(), re.IGNORECASE)
-        tag = re.sub(r"<.*?>%s:\s<.*?>" % tagtype, "", tag, re.IGNORECASE)
-        tag = re.sub(r"<.*?>%s\s:\s<.*?>" % tagtype, "", tag, re.IGNORECASE)
-        tag = re.sub(r"<(em|strong)>%s:<.*?>\s" % tagtype, "", tag, re.IGNORECASE)
-        tag = re.sub(r"<(em|strong)>%s\s:<.*?>\s" % tagtype, "", tag, re.IGNORECASE)
-        tag = re.sub(r"<(em|strong)>%s<.*?>:\s" % tagtype, "", tag, re.IGNORECASE)
-        tag = re.sub(r"<(em|strong)>%s\s<.*?>:\s" % tagtype, "", tag, re.IGNORECASE)
-        string_start = re.search("<[^>]*>", tag)
+        tag = strip_type_re(tagtype).sub(r"\g<open>", tag.strip(), count=1)
+        string_start = _TAG_START_RE.search(tag)
         tag = self.upper_chars(tag, [string_start.end()])
         return tag
 
@@ -303,10 +459,16 @@ class MarkdownConverter:
         Returns:
             uppercased string
         """
-        upper_string = "".join(
-            c.upper() if i in indices else c for i, c in enumerate(string)
-        )
-        return upper_string
+        # Slice around the changed characters instead of walking the string
+        pieces = []
+        start = 0
+        for index in sorted(set(indices)):
+            if 0 <= index < len(string):
+                pieces.append(string[start:index])
+                pieces.append(string[index].upper())
+                start = index + 1
+        pieces.append(string[start:])
+        return "".join(pieces)
 
     def slug(self, string: str, lowercase: bool) -> str:
         """
@@ -323,79 +485,98 @@ class MarkdownConverter:
         if lowercase:
             slug_string = string.lower()
 
-        # Remove all html code tags
-        slug_string = re.sub(r"<[^>]+>", "", slug_string)
-        # Remove html code like '&amp;'
-        slug_string = re.sub(r"&[a-z]+;", "", slug_string)
-        # Replace all spaces ( ) with dash (-)
-        slug_string = str.replace(slug_string, " ", "-")
+        # Remove html tags, html codes like '&amp;' and all special chars,
+        # then replace all spaces ( ) with dash (-)
+        slug_string = _SLUG_STRIP_RE.sub("", slug_string)
 
-        # Remove all special chars, except for dash (-)
-        slug_string = re.sub(r"[^a-zA-Z0-9-]", "", slug_string)
+        return slug_string.replace(" ", "-")
 
-        return slug_string
+    def process_headers(
+        self, ref_prefix: str, ref_postfix: str, headers: typing.List[str]
+    ) -> typing.Dict[str, str]:
+        """
+        Map the markdown anchor of each header to its Confluence anchor
 
-    def process_headers(self, ref_prefix, ref_postfix, headers):
-        headers_map = {}
-        headers_count = {}
+        Args:
+            ref_prefix: anchor prefix for the markdown source
+            ref_postfix: format of the suffix added to repeated anchors
+            headers: header html, in page order
+        Returns:
+            map of markdown anchors to Confluence anchors
+        """
+        headers_map: typing.Dict[str, str] = {}
+        headers_count: typing.Dict[str, int] = {}
+        header_value = self._header_value
 
         for header in headers:
             key = ref_prefix + self.slug(header, True)
+            value = header_value(header)
 
-            if self.editor_version == 1:
-                value = re.sub(r"(<.+>| )", "", header)
-            if self.editor_version == 2:
-                value = self.slug(header, False)
-
-            if key in headers_map:
-                alt_count = headers_count[key]
-
-                alt_key = key + (ref_postfix % alt_count)
-                alt_value = value + (".%s" % alt_count)
-
-                headers_map[alt_key] = alt_value
-                headers_count[key] = alt_count + 1
+            # Repeated headers get numbered anchors, like the markdown renderers
+            count = headers_count.get(key, 0)
+            if count:
+                headers_map[key + (ref_postfix % count)] = value + (".%s" % count)
             else:
                 headers_map[key] = value
-                headers_count[key] = 1
+            headers_count[key] = count + 1
 
         return headers_map
 
     def process_links(
-        self, html, links, headers_map, space_id: int, page_id: int, title: str
-    ):
-        for link in links:
-            matches = re.search(r'<a href="(#.+?)">(.+?)</a>', link)
-            ref = matches.group(1)
-            alt = matches.group(2)
-
-            result_ref = headers_map.get(ref)
-
-            if result_ref:
-                base_uri = "%s/spaces/%d/pages/%d/%s" % (
-                    self.api_url,
-                    space_id,
-                    page_id,
-                    "+".join(title.split()),
-                )
-                if self.editor_version == 1:
-                    replacement = (
-                        '<ac:link ac:anchor="%s">'
-                        "<ac:plain-text-link-body>"
-                        "<![CDATA[%s]]></ac:plain-text-link-body></ac:link>"
-                        % (result_ref, re.sub(r"( *<.+> *)", " ", alt))
-                    )
-                if self.editor_version == 2:
-                    replacement_uri = "%s#%s" % (base_uri, result_ref)
-                    replacement = '<a href="%s" title="%s">%s</a>' % (
-                        replacement_uri,
-                        alt,
-                        alt,
-                    )
-
-                html = html.replace(link, replacement)
+        self,
+        html: str,
+        headers_map: typing.Dict[str, str],
+        space_id: int,
+        page_id: int,
+        title: str,
+    ) -> str:
+        """
+        Point local links at the matching headers of the Confluence page
 
-        return html
+        Args:
+            html: html string
+            headers_map: map of markdown anchors to Confluence anchors
+            space_id: Space ID
+            page_id: Page ID
+            title: Page Title
+        Returns:
+            modified html string
+        """
+        link_macro = self._link_macro
+        if link_macro is None:
+            return html
+
+        base_uri = "%s/spaces/%d/pages/%d/%s" % (
+            self.api_url,
+            space_id,
+            page_id,
+            "+".join(title.split()),
+        )
+
+        def replace_link(match: re.Match) -> str:
+            result_ref = headers_map.get(match.group(1))
+            if not result_ref:
+                return match.group(0)
+            return link_macro(base_uri, result_ref, match.group(2))
+
+        return _LOCAL_LINK_RE.sub(replace_link, html)
+
+    def _header_value_v1(self, header: str) -> str:
+        return _HEADER_STRIP_RE.sub("", header)
+
+    def _header_value_v2(self, header: str) -> str:
+        return self.slug(header, False)
+
+    def _link_macro_v1(self, base_uri: str, ref: str, alt: str) -> str:
+        return (
+            '<ac:link ac:anchor="%s">'
+            "<ac:plain-text-link-body>"
+            "<![CDATA[%s]]></ac:plain-text-link-body></ac:link>"
+            % (ref, _LINK_TEXT_TAGS_RE.sub(" ", alt))
+        )
+
+    def _link_macro_v2(self, base_uri: str, ref: str, alt: str) -> str:
+        return '<a href="%s#%s" title="%s">%s</a>' % (base_uri, ref, alt, alt)
 
     def process_refs(self, html: str) -> str:
         """
@@ -406,30 +587,31 @@ class MarkdownConverter:
         Returns:
             modified html string
         """
-        refs = re.findall(r"\n(\[\^(\d)\].*)|<p>(\[\^(\d)\].*)", html)
+        if "[^" not in html:
+            return html
 
-        if refs:
-            for ref in refs:
-                if ref[0]:
-                    full_ref = ref[0].replace("</p>", "").replace("<p>", "")
-                    ref_id = ref[1]
-                else:
-                    full_ref = ref[2]
-                    ref_id = ref[3]
+        hrefs = {}
 
-                full_ref = full_ref.replace("</p>", "").replace("<p>", "")
-                html = html.replace(full_ref, "")
-                href = re.search('href="(.*?)"', full_ref).group(1)
+        def remove_definition(match: re.Match) -> str:
+            ref = match.group(1) or match.group(3)
+            ref_id = match.group(2) or match.group(4)
+            full_ref = ref.replace("</p>", "").replace("<p>", "")
+            hrefs.setdefault(ref_id, _HREF_RE.search(full_ref).group(1))
 
-                superscript = '<a id="test" href="%s"><sup>%s</sup></a>' % (
-                    href,
-                    ref_id,
-                )
-                html = html.replace("[^%s]" % ref_id, superscript)
+            prefix = "\n" if match.group(1) else "<p>"
+            return prefix + ref.replace(full_ref, "")
 
-        return html
+        html = _REFS_RE.sub(remove_definition, html)
+        if not hrefs:
+            return html
 
-    # Scan for images and upload as attachments if found
+        def superscript(match: re.Match) -> str:
+            href = hrefs.get(match.group(1))
+            if href is None:
+                return match.group(0)
+            return '<a id="test" href="%s"><sup>%s</sup></a>' % (href, match.group(1))
+
+        return _REF_MARKER_RE.sub(superscript, html)
 
     def add_contents(self, html: str) -> str:
         """
@@ -440,25 +622,5 @@ class MarkdownConverter:
         Returns:
             modified html string
         """
-        contents_markup = (
-            '<ac:structured-macro ac:name="toc">\n<ac:parameter ac:name="printable">'
-            'true</ac:parameter>\n<ac:parameter ac:name="style">disc</ac:parameter>'
-        )
-        contents_markup = (
-            contents_markup + '<ac:parameter ac:name="maxLevel">5</ac:parameter>\n'
-            '<ac:parameter ac:name="minLevel">1</ac:parameter>'
-        )
-        contents_markup = (
-            contents_markup
-            + '<ac:parameter ac:name="class">rm-contents</ac:parameter>\n'
-            '<ac:parameter ac:name="exclude"></ac:parameter>\n'
-            '<ac:parameter ac:name="type">list</ac:parameter>'
-        )
-        contents_markup = (
-            contents_markup + '<ac:parameter ac:name="outline">false</ac:parameter>\n'
-            '<ac:parameter ac:name="include"></ac:parameter>\n'
-            "</ac:structured-macro>"
-        )
-
-        html = contents_markup + "\n" + html
+        html = _CONTENTS_MACRO + "\n" + html
         return html
@@ -0,0 +1,17 @@
+class ConfluenceError(Exception):
+    """
+    Raised when the Confluence API rejects a request
+
+    """
+
+    def __init__(self, status_code: int, body: bytes):
+        """
+        Constructor
+
+        Args:
+            status_code: HTTP status code of the response
+            body: raw response body
+        """
+        super().__init__("Error: %d - %s" % (status_code, body))
+        self.status_code = status_code
+        self.body = body
@@ -1,6 +1,18 @@
 import pytest
+import json
 import logging
-from md_to_conf import ConfluenceApiClient
+import requests
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+from md_to_conf import ConfluenceApiClient, ConfluenceError
+from md_to_conf.client import (
+    CheckedResponse,
+    LabelInfo,
+    PageInfo,
+    build_retry,
+    encode_json,
+    guess_content_type,
+)
 
 
 def test_client_init():
@@ -27,6 +39,21 @@ def test_client():
     )
 
 
+@pytest.fixture
+def mocks(monkeypatch):
+    # The client methods that talk to Confluence, replaced for the test
+    namespace = SimpleNamespace(
+        session=Mock(), check_errors=Mock(), get_space_id=Mock(), log_not_found=Mock()
+    )
+    monkeypatch.setattr(ConfluenceApiClient, "get_session", namespace.session)
+    monkeypatch.setattr(
+        ConfluenceApiClient, "check_errors_and_get_json", namespace.check_errors
+    )
+    monkeypatch.setattr(ConfluenceApiClient, "get_space_id", namespace.get_space_id)
+    monkeypatch.setattr(ConfluenceApiClient, "log_not_found", namespace.log_not_found)
+    return namespace
+
+
 def test_get_session_default(test_client):
     session = test_client.get_session()
     assert session.headers.get("Content-Type") == "application/json"
@@ -38,3 +65,320 @@ def test_log_not_found(caplog, test_client):
     assert len(caplog.records) == 4
     assert "test not found." == caplog.records[0].message
     assert "\tPage Id: 0" == caplog.records[3].message
+
+
+@patch("md_to_conf.client.ConfluenceApiClient.update_page_property")
+def test_update_page_properties(mock_update, test_client):
+    mock_update.side_effect = [True, False]
+    props = [{"key": "a", "version": 1, "value": "1"}]
+    props.append({"key": "b", "version": 1, "value": "2"})
+
+    assert not test_client.update_page_properties(1, props)
+    assert mock_update.call_count == 2
+
+
+@patch("md_to_conf.client.ConfluenceApiClient.update_page_property")
+def test_update_page_properties_empty(mock_update, test_client):
+    assert test_client.update_page_properties(1, [])
+    mock_update.assert_not_called()
+
+
+PAGE_RESULTS = {
+    "results": [
+        {
+            "id": "12",
+            "spaceId": "34",
+            "version": {"number": 5},
+            "_links": {"webui": "/spaces/PO/pages/12"},
+        }
+    ]
+}
+# Responses are only read by the client, so the tests can share them
+PAGE_RESPONSE = CheckedResponse(200, PAGE_RESULTS)
+EMPTY_RESPONSE = CheckedResponse(200, {"results": []})
+
+
+def test_get_page_cached(test_client, mocks):
+    mocks.get_space_id.return_value = 34
+    mocks.check_errors.return_value = PAGE_RESPONSE
+
+    first = test_client.get_page("Title")
+    second = test_client.get_page("Title")
+
+    assert first == PageInfo(
+        12, 34, 5, "https://domain.confluence.net/wiki/spaces/PO/pages/12"
+    )
+    assert second is first
+    assert mocks.check_errors.call_count == 1
+
+
+def test_get_page_not_found_not_cached(test_client, mocks):
+    mocks.get_space_id.return_value = 34
+    mocks.check_errors.return_value = EMPTY_RESPONSE
+
+    assert test_client.get_page("Title").id == 0
+    assert test_client.get_page("Title").id == 0
+    assert mocks.check_errors.call_count == 2
+
+
+def test_get_page_title_as_param(test_client, mocks):
+    mocks.get_space_id.return_value = 34
+    mocks.check_errors.return_value = PAGE_RESPONSE
+
+    test_client.get_page("A & B")
+
+    mocks.session.return_value.get.assert_called_once_with(
+        "https://domain.confluence.net/wiki/api/v2/spaces/34/pages",
+        params={"title": "A & B"},
+    )
+
+
+def test_update_page_property_remembers_editor(test_client, mocks):
+    mocks.check_errors.return_value = CheckedResponse(200, {})
+
+    assert test_client.get_known_editor(42) is None
+    assert test_client.update_page_property(
+        42, {"key": "editor", "value": "v2", "version": 4, "id": "10"}
+    )
+    assert test_client.get_known_editor(42) == "v2"
+
+
+def test_get_label_info_cached(test_client, mocks):
+    mocks.check_errors.return_value = CheckedResponse(
+        200, {"label": {"id": "5", "name": "docs", "prefix": "global", "label": "docs"}}
+    )
+
+    first = test_client.get_label_info("docs")
+
+    assert first == LabelInfo(5, "docs", "global", "docs")
+    assert test_client.get_label_info("docs") is first
+    assert mocks.check_errors.call_count == 1
+
+
+@patch("md_to_conf.client.ConfluenceApiClient.add_label")
+def test_update_labels_adds_missing(mock_add_label, test_client, mocks):
+    mocks.check_errors.return_value = CheckedResponse(
+        200, {"results": [{"name": "docs"}]}
+    )
+
+    test_client.update_labels(42, ["docs", "api", "guide", "api"])
+
+    assert sorted(call.args for call in mock_add_label.call_args_list) == [
+        (42, "api"),
+        (42, "guide"),
+    ]
+
+
+SERVER_ERROR = Mock(status_code=500, content=b"boom")
+SERVER_ERROR.raise_for_status.side_effect = requests.HTTPError("500")
+
+
+def test_check_errors_raises(test_client):
+    with pytest.raises(ConfluenceError) as error_info:
+        test_client.check_errors_and_get_json(SERVER_ERROR)
+
+    assert error_info.value.status_code == 500
+    assert error_info.value.body == b"boom"
+
+
+def test_guess_content_type():
+    assert guess_content_type("image.png") == "image/png"
+    assert guess_content_type("no_extension") is None
+
+
+def test_get_session_pool(test_client):
+    session = test_client.get_session(retry=True)
+    adapter = session.get_adapter("https://domain.confluence.net/wiki")
+
+    assert adapter._pool_maxsize == 16
+    assert adapter.max_retries.total == 5
+    assert session.get_adapter("http://domain.confluence.net/wiki") is adapter
+
+
+def test_build_retry():
+    retry = build_retry()
+
+    assert 404 not in retry.status_forcelist
+    assert retry.backoff_factor == 0.5
+    assert retry.backoff_jitter == 0.5
+    assert 429 in retry.status_forcelist
+    assert not retry.raise_on_status
+
+
+def test_build_retry_post_rate_limit_only():
+    retry = build_retry()
+
+    assert retry.is_retry("PUT", 503)
+    assert retry.is_retry("POST", 429)
+    assert not retry.is_retry("POST", 503)
+    assert "POST" not in retry.allowed_methods
+
+
+def test_build_retry_rate_limit_only():
+    retry = build_retry(server_errors=False)
+
+    assert retry.status_forcelist == (429,)
+    assert retry.connect == 0
+    assert retry.respect_retry_after_header
+
+
+def test_get_session_reused(test_client):
+    assert test_client.get_session() is test_client.get_session()
+    assert test_client.get_session(json=False) is not test_client.get_session()
+    assert "Content-Type" not in test_client.get_session(json=False).headers
+
+
+@pytest.fixture
+def image_file(tmp_path) -> str:
+    image = tmp_path / "image.png"
+    image.write_bytes(b"image")
+    return str(image)
+
+
+@patch("md_to_conf.client.ConfluenceApiClient.upload_attachment")
+@patch("md_to_conf.client.ConfluenceApiClient.get_attachment")
+def test_upload_attachments(
+    mock_get_attachment, mock_upload, test_client, mocks, tmp_path
+):
+    new_file = tmp_path / "new.png"
+    new_file.write_bytes(b"new")
+    existing_file = tmp_path / "existing.png"
+    existing_file.write_bytes(b"existing")
+    mock_get_attachment.side_effect = lambda page_id, name: (
+        "att1" if name == "existing.png" else ""
+    )
+    mock_upload.return_value = True
+
+    result = test_client.upload_attachments(
+        42,
+        [
+            (str(new_file), "a new file"),
+            (str(existing_file), ""),
+            (str(tmp_path / "missing.png"), ""),
+        ],
+    )
+
+    assert not result
+    post = mocks.session.return_value.post
+    post.assert_called_once()
+    parts = post.call_args.kwargs["files"]
+    assert [name for name, _ in parts] == ["file", "comment"]
+    assert parts[0][1][0] == "new.png"
+    assert parts[1][1] == (None, "a new file")
+    mock_upload.assert_called_once_with(42, str(existing_file), "", check_exists=False)
+
+
+@patch("md_to_conf.client.ConfluenceApiClient.get_attachment")
+def test_upload_attachments_once_per_page(
+    mock_get_attachment, test_client, mocks, image_file
+):
+    mock_get_attachment.return_value = ""
+
+    assert test_client.upload_attachments(42, [(image_file, "alt"), (image_file, "")])
+    assert test_client.upload_attachments(42, [(image_file, "")])
+    assert test_client.upload_attachment(42, image_file, "")
+
+    mocks.session.return_value.post.assert_called_once()
+
+
+@patch("md_to_conf.client.ConfluenceApiClient.get_attachment")
+def test_upload_attachments_same_name_warns(
+    mock_get_attachment, caplog, test_client, mocks, tmp_path
+):
+    for folder in ("a", "b"):
+        (tmp_path / folder).mkdir()
+        (tmp_path / folder / "logo.png").write_bytes(folder.encode())
+    mock_get_attachment.return_value = ""
+    first = str(tmp_path / "a" / "logo.png")
+    second = str(tmp_path / "b" / "logo.png")
+
+    with caplog.at_level(logging.WARNING):
+        assert test_client.upload_attachments(42, [(first, ""), (second, "")])
+        assert test_client.upload_attachment(42, second, "")
+
+    mocks.session.return_value.post.assert_called_once()
+    assert len(caplog.records) == 2
+    assert "already has logo.png from %s" % first in caplog.records[0].message
+
+
+def test_get_attachments_paged_and_cached(test_client, mocks):
+    first = Mock()
+    first.content = json.dumps(
+        {
+            "results": [{"title": "one.png", "id": "att1"}],
+            "_links": {"next": "/wiki/api/v2/pages/42/attachments?cursor=abc"},
+        }
+    ).encode()
+    second = Mock()
+    second.content = json.dumps(
+        {"results": [{"title": "two.png", "id": "att2"}], "_links": {}}
+    ).encode()
+    mocks.session.return_value.get.side_effect = [first, second]
+
+    assert test_client.get_attachment(42, "two.png") == "att2"
+    assert test_client.get_attachment(42, "one.png") == "att1"
+    assert test_client.get_attachment(42, "three.png") == ""
+
+    calls = [
+        (call.args[0], call.kwargs["params"])
+        for call in mocks.session.return_value.get.call_args_list
+    ]
+    assert calls == [
+        (
+            "https://domain.confluence.net/wiki/api/v2/pages/42/attachments",
+            {"limit": 250},
+        ),
+        (
+            "https://domain.confluence.net/wiki/api/v2/pages/42/attachments?cursor=abc",
+            None,
+        ),
+    ]
+
+
+@patch("md_to_conf.client.ConfluenceApiClient.get_attachment")
+def test_upload_attachment_remote(mock_get_attachment, test_client):
+    assert not test_client.upload_attachment(42, "https://example.com/a.png", "")
+    mock_get_attachment.assert_not_called()
+
+
+def test_upload_attachment_local_http_name(caplog, test_client):
+    # A local file whose name merely contains "http" is not a remote URL
+    with caplog.at_level(logging.ERROR):
+        assert not test_client.upload_attachment(42, "/missing/img_http.png", "")
+    assert "cannot be found" in caplog.records[0].message
+
+
+def test_encode_json():
+    assert encode_json({"value": "caf\u00e9", "n": [1, 2]}) == (
+        '{"value":"caf\u00e9","n":[1,2]}'.encode("utf-8")
+    )
+
+
+@patch("md_to_conf.client.ConfluenceApiClient.get_session")
+@patch("md_to_conf.client.ConfluenceApiClient.check_errors_and_get_json")
+def test_get_space_id_cached(mock_check, mock_session, test_client):
+    mock_check.return_value = CheckedResponse(200, {"results": [{"id": "34"}]})
+
+    assert test_client.get_space_id() == 34
+    assert test_client.get_space_id() == 34
+    assert mock_check.call_count == 1
+    mock_session.return_value.get.assert_called_once_with(
+        "https://domain.confluence.net/wiki/api/v2/spaces", params={"keys": "PO"}
+    )
+
+
+@patch("md_to_conf.client.ConfluenceApiClient.get_attachment")
+def test_upload_attachment_existing_file(
+    mock_get_attachment, test_client, mocks, image_file
+):
+    mock_get_attachment.return_value = "att1"
+
+    assert test_client.upload_attachment(42, image_file, "comment")
+
+    post = mocks.session.return_value.post
+    assert post.call_args.args[0] == (
+        "https://domain.confluence.net/wiki/rest/api/content/42"
+        "/child/attachment/att1/data"
+    )
+    file_handle = post.call_args.kwargs["files"]["file"][1]
+    assert file_handle.closed
@@ -0,0 +1,241 @@
+import pytest
+from unittest.mock import patch
+from md_to_conf import ConfluenceConverter, MarkdownConverter
+from md_to_conf.client import PageInfo
+
+
+@pytest.fixture
+def test_confluence_converter() -> ConfluenceConverter:
+    return ConfluenceConverter(
+        "tests/testfiles/basic.md",
+        "default",
+        None,
+        "domain",
+        True,
+        "user",
+        "PO",
+        "key",
+        None,
+        2,
+    )
+
+
+@patch("md_to_conf.client.ConfluenceApiClient.upload_attachments")
+def test_add_images(mock_upload, test_confluence_converter: ConfluenceConverter):
+    html = (
+        '<p><img alt="one" src="images/one.png" /></p>'
+        '<p><img alt="remote" src="https://example.com/two.png" /></p>'
+        '<p><a href="images/one.png">images/one.png</a></p>'
+        '<p><img alt="again" src="images/one.png" /></p>'
+    )
+
+    result = test_confluence_converter.add_images(42, html)
+
+    uploads = mock_upload.call_args.args[1]
+    assert [comment for _, comment in uploads] == ["one"]
+    assert (
+        result == '<p><img alt="one" src="/wiki/download/attachments/42/one.png" /></p>'
+        '<p><img alt="remote" src="https://example.com/two.png" /></p>'
+        '<p><a href="images/one.png">images/one.png</a></p>'
+        '<p><img alt="again" src="/wiki/download/attachments/42/one.png" /></p>'
+    )
+
+
+@patch("md_to_conf.client.ConfluenceApiClient.upload_attachments")
+def test_add_attachments(mock_upload, test_confluence_converter: ConfluenceConverter):
+    test_confluence_converter.add_attachments(42, ["one.txt", "two.txt"])
+
+    mock_upload.assert_called_once()
+    uploaded = [path for path, _ in mock_upload.call_args.args[1]]
+    assert uploaded[0].endswith("tests/testfiles/one.txt")
+    assert uploaded[1].endswith("tests/testfiles/two.txt")
+
+
+@patch("md_to_conf.client.ConfluenceApiClient.get_page_properties")
+def test_get_properties_to_update(
+    mock_properties, test_confluence_converter: ConfluenceConverter
+):
+    mock_properties.return_value = [
+        {"key": "editor", "value": "v1", "version": {"number": 3}, "id": "10"},
+        {"key": "owner", "value": "me", "version": {"number": 1}, "id": "11"},
+    ]
+
+    result = test_confluence_converter.get_properties_to_update(
+        {"owner": "you", "status": "draft"}, 42
+    )
+
+    assert result == [
+        {"key": "editor", "version": 4, "value": "v2", "id": "10"},
+        {"key": "owner", "version": 2, "value": "you", "id": "11"},
+        {"key": "status", "version": 1, "value": "draft"},
+    ]
+
+
+@patch("md_to_conf.client.ConfluenceApiClient.get_page_properties")
+def test_get_properties_to_update_editor_override(
+    mock_properties, test_confluence_converter: ConfluenceConverter
+):
+    mock_properties.return_value = [
+        {"key": "editor", "value": "v1", "version": {"number": 3}, "id": "10"},
+    ]
+
+    result = test_confluence_converter.get_properties_to_update({"editor": "v3"}, 42)
+
+    assert result == [{"key": "editor", "version": 4, "value": "v3", "id": "10"}]
+
+
+@patch("md_to_conf.client.ConfluenceApiClient.get_page_properties")
+@patch("md_to_conf.client.ConfluenceApiClient.get_known_editor")
+def test_get_properties_to_update_editor_known(
+    mock_known_editor, mock_properties, test_confluence_converter: ConfluenceConverter
+):
+    mock_known_editor.return_value = "v2"
+
+    assert test_confluence_converter.get_properties_to_update({}, 42) == []
+    mock_properties.assert_not_called()
+
+
+def test_add_local_refs(test_confluence_converter: ConfluenceConverter):
+    converter = MarkdownConverter(
+        "tests/testfiles/basic.md", "https://domain.atlassian.net/wiki", "default", 2
+    )
+    html = '<h2>Heading 2</h2><p><a href="#heading-2">Go</a></p>'
+
+    result = test_confluence_converter.add_local_refs(42, 7, "My Page", html, converter)
+
+    assert result == (
+        "<h2>Heading 2</h2><p>"
+        '<a href="https://domain.atlassian.net/wiki/spaces/7/pages/42/My+Page'
+        '#Heading-2" title="Go">Go</a></p>'
+    )
+
+
+@pytest.mark.parametrize(
+    "org_name,use_ssl,expected",
+    [
+        ("domain", True, "https://domain.atlassian.net/wiki"),
+        ("domain", False, "http://domain.atlassian.net/wiki"),
+        ("wiki.example.com", True, "https://wiki.example.com"),
+        ("wiki.example.com", False, "http://wiki.example.com"),
+    ],
+)
+def test_get_confluence_api_url(
+    test_confluence_converter: ConfluenceConverter, org_name, use_ssl, expected
+):
+    test_confluence_converter.org_name = org_name
+    test_confluence_converter.use_ssl = use_ssl
+
+    assert test_confluence_converter.get_confluence_api_url() == expected
+
+
+def test_confluence_api_url_resolved_once(
+    test_confluence_converter: ConfluenceConverter,
+):
+    assert test_confluence_converter.confluence_api_url == (
+        "https://domain.atlassian.net/wiki"
+    )
+    assert (
+        test_confluence_converter.confluence_client.confluence_api_url
+        == test_confluence_converter.confluence_api_url
+    )
+
+
+@patch("md_to_conf.client.ConfluenceApiClient.upload_attachments")
+def test_add_images_only_rewrites_src(
+    mock_upload, test_confluence_converter: ConfluenceConverter
+):
+    html = '<img data-src="one.png" alt="one.png" src="one.png" />'
+
+    result = test_confluence_converter.add_images(42, html)
+
+    mock_upload.assert_called_once()
+    assert result == (
+        '<img data-src="one.png" alt="one.png" '
+        'src="/wiki/download/attachments/42/one.png" />'
+    )
+
+
+def test_add_local_refs_no_links(test_confluence_converter: ConfluenceConverter):
+    converter = MarkdownConverter(
+        "tests/testfiles/basic.md", "https://domain.atlassian.net/wiki", "default", 2
+    )
+    html = "<h2>Heading 2</h2>\n<p>No links</p>"
+
+    assert (
+        test_confluence_converter.add_local_refs(42, 7, "My Page", html, converter)
+        == html
+    )
+
+
+@patch("md_to_conf.converter.MarkdownConverter.process_headers")
+def test_add_local_refs_no_headers(
+    mock_process_headers, test_confluence_converter: ConfluenceConverter
+):
+    converter = MarkdownConverter(
+        "tests/testfiles/basic.md", "https://domain.atlassian.net/wiki", "default", 2
+    )
+    html = '<p><a href="#missing">Go</a></p>'
+
+    assert (
+        test_confluence_converter.add_local_refs(42, 7, "My Page", html, converter)
+        == html
+    )
+    mock_process_headers.assert_not_called()
+
+
+@patch("md_to_conf.client.ConfluenceApiClient.create_page")
+@patch("md_to_conf.client.ConfluenceApiClient.delete_page")
+@patch("md_to_conf.client.ConfluenceApiClient.get_page")
+def test_convert_delete(
+    mock_get_page,
+    mock_delete_page,
+    mock_create_page,
+    test_confluence_converter: ConfluenceConverter,
+):
+    mock_get_page.return_value = PageInfo(12, 34, 5, "")
+
+    test_confluence_converter.convert(False, True, False, False, [], {}, [])
+
+    mock_get_page.assert_called_once_with("Basic Page")
+    mock_delete_page.assert_called_once_with(12)
+    mock_create_page.assert_not_called()
+
+
+@patch("md_to_conf.client.ConfluenceApiClient.create_page")
+@patch("md_to_conf.client.ConfluenceApiClient.delete_page")
+@patch("md_to_conf.client.ConfluenceApiClient.get_page")
+def test_convert_delete_missing_page(
+    mock_get_page,
+    mock_delete_page,
+    mock_create_page,
+    test_confluence_converter: ConfluenceConverter,
+):
+    mock_get_page.return_value = PageInfo(0, 0, 0, "")
+
+    test_confluence_converter.convert(False, True, False, False, [], {}, [])
+
+    mock_delete_page.assert_not_called()
+    mock_create_page.assert_not_called()
+
+
+@patch("md_to_conf.client.ConfluenceApiClient.get_page")
+def test_get_parent_page_missing(
+    mock_get_page, caplog, test_confluence_converter: ConfluenceConverter
+):
+    mock_get_page.return_value = PageInfo(0, 0, 0, "")
+    test_confluence_converter.ancestor = "Parent"
+
+    assert test_confluence_converter.get_parent_page() == 0
+    assert "Parent page does not exist" in caplog.records[0].message
+
+
+@patch("md_to_conf.client.ConfluenceApiClient.get_page_properties")
+def test_get_properties_to_update_unchanged(
+    mock_properties, test_confluence_converter: ConfluenceConverter
+):
+    mock_properties.return_value = [
+        {"key": "editor", "value": "v2", "version": {"number": 3}, "id": "10"},
+        {"key": "owner", "value": "me", "version": {"number": 1}, "id": "11"},
+    ]
+
+    assert test_confluence_converter.get_properties_to_update({"owner": "me"}, 42) == []
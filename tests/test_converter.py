@@ -1,5 +1,7 @@
 import pytest
+from unittest.mock import Mock
 from md_to_conf import MarkdownConverter
+from md_to_conf.converter import get_markdown, markdown_extensions
 
 
 URL = "https://domain.confluence.net/wiki"
@@ -78,3 +80,226 @@ def test_toc_convert(test_converter_basic: MarkdownConverter, snapshot):
     )
 
     assert slug == snapshot
+
+
+def test_convert_doctoc_and_comments(test_converter_basic: MarkdownConverter):
+    html = test_converter_basic.convert_doctoc_and_comments(
+        "<!-- START doctoc -->\n<p>x</p>\n<!-- END doctoc -->\n<!-- note -->"
+    )
+
+    assert html.startswith('<p>\n        <ac:structured-macro ac:name="toc">')
+    assert "doctoc" not in html
+    assert html.endswith("<ac:placeholder> note </ac:placeholder>")
+
+
+@pytest.mark.parametrize(
+    "content,ending",
+    [
+        (
+            "# T\n\n<!-- START doctoc -->\n> *info*\n[^1]<!-- END doctoc -->",
+            "</p></ac:rich-text-body></ac:structured-macro></p>",
+        ),
+        (
+            "# T\n\n> Note: careful\n\n<!-- START doctoc -->\n- a\n<!-- END doctoc -->",
+            "</ac:structured-macro>\n        </p>",
+        ),
+    ],
+)
+def test_doctoc_with_blockquote(content, ending):
+    # Block quotes become macros before the doctoc block is replaced
+    converter = MarkdownConverter("missing.md", URL, "default", 2, content)
+
+    html = converter.convert_md_to_conf_html()
+
+    assert "blockquote>" not in html
+    assert 'ac:name="toc"' in html
+    assert html.endswith(ending)
+
+
+def test_converter_preloaded_content(test_converter_basic: MarkdownConverter):
+    with open("tests/testfiles/basic.md", "r", encoding="utf-8") as mdfile:
+        md_content = mdfile.read()
+    converter = MarkdownConverter("missing.md", URL, "default", 2, md_content)
+
+    assert converter.get_html_from_markdown() == (
+        test_converter_basic.get_html_from_markdown()
+    )
+
+
+def test_convert_code_block(test_converter_basic: MarkdownConverter):
+    html = test_converter_basic.convert_code_block(
+        '<p>a &amp; b</p><pre><code class="language-python">'
+        "if a &lt; b &amp;&amp; c &gt; d: print(&quot;&amp;lt;&quot;)"
+        "</code></pre>"
+    )
+
+    assert html == (
+        "<p>a &amp; b</p>"
+        '<ac:structured-macro ac:name="code">'
+        '<ac:parameter ac:name="theme">Midnight</ac:parameter>'
+        '<ac:parameter ac:name="linenumbers">true</ac:parameter>'
+        '<ac:parameter ac:name="language">python</ac:parameter>'
+        "<ac:plain-text-body><![CDATA["
+        'if a < b && c > d: print("&lt;")'
+        "]]></ac:plain-text-body></ac:structured-macro>"
+    )
+
+
+@pytest.mark.parametrize(
+    "quote,expected",
+    [
+        ("<p>Note: be careful</p>", "<p>Be careful</p>"),
+        ("<p>note : be careful</p>", "<p>Be careful</p>"),
+        ("<p><strong>Note:</strong> be careful</p>", "<p>Be careful</p>"),
+        ("<p><em>Note</em>: be careful</p>", "<p>Be careful</p>"),
+        (
+            "<p>Note: set the note: field, see NOTE: below</p>",
+            "<p>Set the note: field, see NOTE: below</p>",
+        ),
+        (
+            "<p>Note: first</p>\n<p>Note: second</p>",
+            "<p>First</p>\n<p>Note: second</p>",
+        ),
+    ],
+)
+def test_strip_type(test_converter_basic: MarkdownConverter, quote, expected):
+    assert test_converter_basic.strip_type(quote, "Note") == expected
+
+
+@pytest.mark.parametrize(
+    "indices,expected",
+    [([3], "<p>Hello</p>"), ([0, 4], "<p>hEllo</p>"), ([20], "<p>hello</p>")],
+)
+def test_upper_chars(test_converter_basic: MarkdownConverter, indices, expected):
+    assert test_converter_basic.upper_chars("<p>hello</p>", indices) == expected
+
+
+def test_convert_info_macros_markers(test_converter_basic: MarkdownConverter):
+    html = test_converter_basic.convert_info_macros(
+        "<p>~?Info?~</p>\n<p>~!Note!~</p>\n<p>~%Warning%~</p>"
+    )
+
+    close_tag = "</p></ac:rich-text-body></ac:structured-macro></p>"
+    assert html == (
+        '<p><ac:structured-macro ac:name="info"><ac:rich-text-body><p>Info'
+        + close_tag
+        + '\n<p><ac:structured-macro ac:name="note"><ac:rich-text-body><p>Note'
+        + close_tag
+        + '\n<p><ac:structured-macro ac:name="warning"><ac:rich-text-body><p>Warning'
+        + close_tag
+    )
+
+
+def test_markdown_instance_reused(test_converter_basic: MarkdownConverter, monkeypatch):
+    first = test_converter_basic.get_html_from_markdown()
+    with open("tests/testfiles/basic.md", "r", encoding="utf-8-sig") as mdfile:
+        extensions = markdown_extensions(mdfile.read())
+    md = get_markdown(extensions)
+    convert = Mock(wraps=md.convert)
+    monkeypatch.setattr(md, "convert", convert)
+
+    assert test_converter_basic.get_html_from_markdown() == first
+    convert.assert_called_once()
+    assert md is not get_markdown()
+
+
+@pytest.mark.parametrize(
+    "content,extensions",
+    [
+        ("# Title\n\n- item", ("mdx_truly_sane_lists",)),
+        ("a | b\n--|--\n1 | 2", ("tables", "mdx_truly_sane_lists")),
+        (
+            "```\ncode\n```\n\nx[^1]",
+            ("fenced_code", "footnotes", "mdx_truly_sane_lists"),
+        ),
+    ],
+)
+def test_markdown_extensions(content, extensions):
+    assert markdown_extensions(content) == extensions
+
+
+def test_slug_entities(test_converter_basic: MarkdownConverter):
+    slug = test_converter_basic.slug("<em>Fish</em> &amp; Chips 2", True)
+    assert slug == "fish--chips-2"
+
+
+@pytest.mark.parametrize(
+    "quote,macro",
+    [
+        ("<p><strong>Note:</strong> a</p>", "note"),
+        ("<p><em>warning</em>: a</p>", "warning"),
+        ("<p><em>Warning</em> or <em>Note</em></p>", "note"),
+        ("<p>Just a quote</p>", "info"),
+    ],
+)
+def test_convert_info_macros_quotes(
+    test_converter_basic: MarkdownConverter, quote, macro
+):
+    html = test_converter_basic.convert_info_macros(
+        "<blockquote>\n%s\n</blockquote>" % quote
+    )
+    assert html.startswith('<p><ac:structured-macro ac:name="%s">' % macro)
+
+
+def test_remove_emojies(test_converter_basic: MarkdownConverter):
+    html = test_converter_basic.remove_emojies(
+        "<p>Ship it \U0001F680\U0001F680 \U0001F600 \U0001F914 \U0001FAE0 é</p>"
+    )
+    assert html == "<p>Ship it     é</p>"
+
+
+def test_process_refs(test_converter_basic: MarkdownConverter):
+    html = test_converter_basic.process_refs(
+        "<p>See [^1] and [^2].</p>\n"
+        '<p>[^1]: <a href="https://example.com">Example</a></p>'
+    )
+
+    assert html == (
+        '<p>See <a id="test" href="https://example.com"><sup>1</sup></a>'
+        " and [^2].</p>\n<p></p>"
+    )
+
+
+def test_process_links_editor_v1():
+    converter = MarkdownConverter("tests/testfiles/basic.md", URL, "default", 1)
+    html = '<p><a href="#intro">See intro</a> <a href="#other">x</a></p>'
+
+    result = converter.process_links(html, {"#intro": "Intro"}, 7, 42, "My Page")
+
+    assert result == (
+        '<p><ac:link ac:anchor="Intro"><ac:plain-text-link-body>'
+        "<![CDATA[See intro]]></ac:plain-text-link-body></ac:link>"
+        ' <a href="#other">x</a></p>'
+    )
+
+
+def test_process_links_editor_v2():
+    converter = MarkdownConverter("tests/testfiles/basic.md", URL, "default", 2)
+    html = '<p><a href="#intro">See intro</a></p>'
+
+    result = converter.process_links(html, {"#intro": "Intro"}, 7, 42, "My Page")
+
+    assert result == (
+        '<p><a href="%s/spaces/7/pages/42/My+Page#Intro" title="See intro">'
+        "See intro</a></p>" % URL
+    )
+
+
+def test_process_links_unknown_editor():
+    converter = MarkdownConverter("tests/testfiles/basic.md", URL, "default", 3)
+    html = '<p><a href="#intro">See intro</a></p>'
+
+    assert converter.process_links(html, {"#intro": "Intro"}, 7, 42, "T") == html
+
+
+def test_process_headers_duplicates(test_converter_basic: MarkdownConverter):
+    headers_map = test_converter_basic.process_headers(
+        "#", "_%d", ["Setup", "Usage", "Setup", "Setup"]
+    )
+
+    assert headers_map == {
+        "#setup": "Setup",
+        "#usage": "Usage",
+        "#setup_1": "Setup.1",
+        "#setup_2": "Setup.2",
+    }
@@ -0,0 +1,65 @@
+import pytest
+from unittest.mock import patch
+from md_to_conf import ConfluenceError, get_config, get_parser, main, run
+
+
+def test_get_parser_cached():
+    assert get_parser() is get_parser()
+
+
+def test_parser_defaults():
+    args = get_parser().parse_args(["tests/testfiles/basic.md", "PO"])
+
+    assert args.markdownFile == ["tests/testfiles/basic.md"]
+    assert args.spacekey == "PO"
+    assert args.version == 2
+    assert args.labels == []
+    assert not args.simulate
+
+
+def test_run_missing_file(monkeypatch):
+    monkeypatch.setenv("CONFLUENCE_USERNAME", "user")
+    monkeypatch.setenv("CONFLUENCE_API_KEY", "key")
+    monkeypatch.setenv("CONFLUENCE_ORGNAME", "domain")
+
+    with pytest.raises(SystemExit):
+        run(["tests/testfiles/missing.md", "PO"])
+
+
+def test_parser_multiple_files():
+    args = get_parser().parse_args(
+        ["tests/testfiles/basic.md", "tests/testfiles/advanced.md", "PO"]
+    )
+
+    assert args.markdownFile == [
+        "tests/testfiles/basic.md",
+        "tests/testfiles/advanced.md",
+    ]
+    assert args.spacekey == "PO"
+
+
+def test_get_config(monkeypatch):
+    monkeypatch.setenv("CONFLUENCE_USERNAME", "user")
+    monkeypatch.setenv("CONFLUENCE_API_KEY", "key")
+    monkeypatch.setenv("CONFLUENCE_ORGNAME", "domain")
+
+    config = get_config(
+        ["tests/testfiles/basic.md", "PO", "--nossl", "--property", "a=b"]
+    )
+
+    assert config.markdown_files == ["tests/testfiles/basic.md"]
+    assert config.username == "user"
+    assert config.org_name == "domain"
+    assert not config.use_ssl
+    assert config.properties == {"a": "b"}
+    assert config.log_level == "INFO"
+
+
+@patch("md_to_conf.run")
+def test_main_exits_on_confluence_error(mock_run):
+    mock_run.side_effect = ConfluenceError(500, b"boom")
+
+    with pytest.raises(SystemExit) as exit_info:
+        main()
+
+    assert exit_info.value.code == 1